@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+NodeSeek Hybrid Signer Benchmark
+离线性能基准 - 本地模拟 NodeSeek API + 多账户规模压测
+
+Features:
+- 本地模拟 /api/attendance 与 /api/account/credit/page-N
+- 可配置响应延迟、403/500/401/302 错误注入、分页深度
+- 驱动 NodeSeekHybridSigner 完整流程，统计墙钟时间、请求速率、
+  单账户耗时 p50/p95 与峰值内存 (每个场景在独立子进程中运行)
+
+Usage:
+    python nodeseek_bench.py
+    python nodeseek_bench.py --accounts 10 100 --latency 0.05 --error-403 0.1
+    python nodeseek_bench.py --concurrency thread --workers 16 --json bench.json
+
+License: MIT
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from typing import Dict, List, Any
+
+RESULT_MARKER = "BENCH_RESULT "
+
+@dataclass
+class MockServerConfig:
+    """模拟服务器配置"""
+    latency: float = 0.02                    # 每个请求的基础延迟 (秒)
+    latency_jitter: float = 0.0              # 额外随机延迟上限 (秒)
+    error_rates: Dict[int, float] = field(default_factory=dict)  # 签到接口错误注入 {状态码: 概率}
+    pages: int = 4                           # 账本分页深度
+    page_size: int = 10                      # 每页记录数
+
+class MockNodeSeekServer:
+    """本地 NodeSeek API 模拟服务器"""
+
+    def __init__(self, config: MockServerConfig):
+        self.config = config
+        self.requests = 0
+        self._signed = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _credit_page(self, page: int) -> List[List[Any]]:
+        """生成一页账本记录 (每天一条签到收益，时间倒序)"""
+        if page > self.config.pages:
+            return []
+        now = datetime.now(timezone.utc)
+        start = (page - 1) * self.config.page_size
+        return [
+            [5, 1000 - day, "签到收益5个鸡腿",
+             (now - timedelta(days=day, minutes=1)).strftime("%Y-%m-%dT%H:%M:%S.000Z")]
+            for day in range(start, start + self.config.page_size)
+        ]
+
+    def _inject_error(self):
+        """按配置概率返回注入的错误状态码"""
+        roll = random.random()
+        for status, rate in self.config.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def handle(self, method: str, path: str, cookie: str):
+        """处理请求，返回 (状态码, 响应头, 响应体)"""
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.config.latency + random.uniform(0, self.config.latency_jitter))
+
+        if method == "POST" and path.startswith("/api/attendance"):
+            status = self._inject_error()
+            if status == 403:
+                return 403, {"Content-Type": "text/html"}, "<title>Just a moment...</title> cloudflare challenge"
+            if status == 302:
+                return 302, {"Location": "/signIn.html"}, ""
+            if status == 401:
+                return 401, {}, {"success": False, "message": "请先登录"}
+            if status == 500:
+                return 500, {}, {"success": False, "message": "服务器内部错误"}
+            with self._lock:
+                already = cookie in self._signed
+                self._signed.add(cookie)
+            if already:
+                return 500, {}, {"success": False, "message": "今天已完成签到，请勿重复操作"}
+            return 200, {}, {"success": True, "gain": 5, "current": 1005, "message": "签到成功"}
+
+        if method == "GET" and path.startswith("/api/account/credit/page-"):
+            try:
+                page = int(path.rsplit("-", 1)[1])
+            except ValueError:
+                return 404, {}, {"success": False}
+            return 200, {}, {"success": True, "data": self._credit_page(page)}
+
+        return 404, {}, {"success": False, "message": "Not Found"}
+
+    def start(self) -> str:
+        """启动服务器 (后台线程)，返回基础 URL"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method: str):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                # 兼容作为 HTTP 代理接收的绝对 URI 请求 (用于模拟代理路径)
+                target = urlsplit(self.path)
+                path = target.path + (f"?{target.query}" if target.query else "")
+                status, headers, body = mock.handle(method, path, self.headers.get("Cookie", ""))
+                payload = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                headers.setdefault("Content-Type", "application/json")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def run_scenario(params: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前进程中运行一个场景 (由子进程调用)"""
+    import logging
+    import resource
+
+    # 子进程环境已由 scenario_env 清理，这里只设置场景所需的变量
+    # (历史、指标、报告均落在临时缓存目录或关闭)
+    os.environ.update({
+        "NS_BASE_URL": params["base_url"],
+        "NS_COOKIE": "&".join(f"session=bench{i}; smac=bench" for i in range(params["accounts"])),
+        "NS_CACHE_DIR": tempfile.mkdtemp(prefix="nodeseek-bench-"),
+        "NS_CONCURRENCY": params["concurrency"],
+        "NS_MAX_WORKERS": str(params["workers"]),
+        "NS_HOST_CONCURRENCY": str(params["workers"]),
+        "NS_RATE_LIMIT": str(params["rate"]),
+        "NS_RATE_JITTER": "0",
+        "ENABLE_STATISTICS": "true" if params["statistics"] else "false",
+        "ENABLE_SELENIUM": "false",
+        "TG_BOT_TOKEN": "",
+        "TG_CHAT_ID": "",
+    })
+
+    import nodeseek_hybrid
+    logging.getLogger().setLevel(logging.ERROR)
+
+    signer = nodeseek_hybrid.NodeSeekHybridSigner()
+    latencies = []
+    process_account = signer.process_account
+
+    def timed(account):
+        started = time.perf_counter()
+        try:
+            return process_account(account)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    signer.process_account = timed
+    started = time.perf_counter()
+    signer.run()
+    wall = time.perf_counter() - started
+
+    return {
+        "wall": wall,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def scenario_env() -> Dict[str, str]:
+    """子进程环境: 去掉调用方的 NS_* 及账户/代理/通知配置，避免读取真实 Cookie 或覆盖真实历史与指标"""
+    inherited = ("PROXY_URL", "TG_BOT_TOKEN", "TG_CHAT_ID", "USER", "PASS", "ENABLE_STATISTICS", "ENABLE_SELENIUM")
+    return {
+        key: value for key, value in os.environ.items()
+        if not key.startswith("NS_") and key not in inherited
+    }
+
+def benchmark(server: MockNodeSeekServer, accounts: int, args) -> Dict[str, Any]:
+    """在独立子进程中运行场景，返回汇总指标"""
+    params = {
+        "base_url": server.base_url,
+        "accounts": accounts,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "rate": args.rate,
+        "statistics": args.statistics,
+    }
+    requests_before = server.requests
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", json.dumps(params)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=scenario_env()
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"场景运行失败 ({accounts} 个账户):\n{proc.stderr[-2000:]}")
+
+    result = json.loads(lines[-1][len(RESULT_MARKER):])
+    requests = server.requests - requests_before
+    result.update({
+        "accounts": accounts,
+        "requests": requests,
+        "requests_per_sec": requests / result["wall"] if result["wall"] > 0 else 0.0,
+    })
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="NodeSeek 混合签到器离线性能基准")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1, 10, 100, 1000], help="账户规模")
+    parser.add_argument("--concurrency", default="serial", choices=["serial", "thread", "asyncio"], help="执行模式")
+    parser.add_argument("--workers", type=int, default=8, help="并发工作数")
+    parser.add_argument("--rate", type=float, default=0, help="每主机限速 (请求/秒，0 为不限速)")
+    parser.add_argument("--statistics", action="store_true", help="启用30天统计 (分页拉取账本)")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟响应延迟 (秒)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="额外随机延迟上限 (秒)")
+    parser.add_argument("--pages", type=int, default=4, help="账本分页深度")
+    for status in (403, 500, 401, 302):
+        parser.add_argument(f"--error-{status}", type=float, default=0.0, help=f"签到接口返回 {status} 的概率")
+    parser.add_argument("--json", help="将结果写入 JSON 文件")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_MARKER + json.dumps(run_scenario(json.loads(args.child))))
+        return
+
+    server = MockNodeSeekServer(MockServerConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rates={status: rate for status, rate in (
+            (403, args.error_403), (500, args.error_500), (401, args.error_401), (302, args.error_302)
+        ) if rate > 0},
+        pages=args.pages,
+    ))
+    server.start()
+    print(f"🧪 模拟服务器: {server.base_url} | 模式: {args.concurrency} | 工作数: {args.workers}")
+
+    results = []
+    try:
+        print(f"{'账户数':>8} {'墙钟(s)':>10} {'请求/秒':>10} {'p50(s)':>9} {'p95(s)':>9} {'峰值RSS(MB)':>12}")
+        for count in args.accounts:
+            result = benchmark(server, count, args)
+            results.append(result)
+            print(f"{count:>8} {result['wall']:>10.2f} {result['requests_per_sec']:>10.1f} "
+                  f"{result['p50']:>9.3f} {result['p95']:>9.3f} {result['peak_rss_mb']:>12.1f}")
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "server": asdict(server.config),
+                "options": {k: v for k, v in vars(args).items() if k not in ("json", "child")},
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已写入 {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -21,34 +21,82 @@ import json
 import random
 import traceback
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass
+import re
+import csv
+import itertools
+import gzip
+import queue
+import hashlib
+import importlib.util
+import signal
+import sqlite3
+import threading
+import multiprocessing
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Iterator
+from dataclasses import dataclass, asdict
+from enum import Enum
+from types import SimpleNamespace
 
-# 尝试导入HTTP库 (优先使用 curl_cffi)
-try:
-    from curl_cffi import requests as cf_requests
-    USE_CURL_CFFI = True
+# 依赖按需加载: 启动时仅做模块查找，首次使用时才真正导入 (加快冷启动)
+USE_CURL_CFFI = importlib.util.find_spec("curl_cffi") is not None
+if USE_CURL_CFFI:
     print("✅ 使用 curl_cffi 增强 Cloudflare 绕过能力")
-except ImportError:
-    import requests as cf_requests
-    USE_CURL_CFFI = False
+else:
     print("⚠️  使用 requests 库 (建议安装 curl_cffi)")
 
-# 尝试导入 Selenium (fallback 使用)
-SELENIUM_AVAILABLE = False
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.options import Options
-    import undetected_chromedriver as uc
-    SELENIUM_AVAILABLE = True
+# Selenium (fallback 使用)
+SELENIUM_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("selenium", "undetected_chromedriver")
+)
+if SELENIUM_AVAILABLE:
     print("✅ Selenium 终极 Fallback 可用")
-except ImportError:
+else:
     print("⚠️  Selenium 不可用 (GitHub Actions 中会自动安装)")
 
+_backend_lock = threading.Lock()
+_http_backend = None
+_selenium_modules = None
+
+def get_http_backend():
+    """首次使用时导入 HTTP 库 (curl_cffi 优先，否则 requests)"""
+    global _http_backend
+    with _backend_lock:
+        if _http_backend is None:
+            if USE_CURL_CFFI:
+                from curl_cffi import requests as backend
+            else:
+                import requests as backend
+            _http_backend = backend
+        return _http_backend
+
+def load_selenium() -> SimpleNamespace:
+    """首次使用时导入 Selenium 与 undetected_chromedriver"""
+    global _selenium_modules
+    if not SELENIUM_AVAILABLE:
+        raise ImportError("Selenium 不可用")
+    with _backend_lock:
+        if _selenium_modules is None:
+            from selenium import webdriver
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.webdriver.chrome.options import Options
+            import undetected_chromedriver as uc
+            _selenium_modules = SimpleNamespace(
+                webdriver=webdriver, By=By, WebDriverWait=WebDriverWait,
+                EC=EC, Options=Options, uc=uc
+            )
+        return _selenium_modules
+
+NODESEEK_BASE_URL = "https://www.nodeseek.com"
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+
 # 通知模块动态加载
 try:
     from notify import send
@@ -59,8 +107,36 @@ except ImportError:
         print(f"📢 {title}: {content}")
 
 # Telegram Bot 推送功能
-def send_telegram_message(message: str, parse_mode: str = "HTML"):
-    """发送Telegram消息"""
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def telegram_configured() -> bool:
+    """是否配置了 Telegram 推送"""
+    return bool(os.environ.get("TG_BOT_TOKEN", "") and os.environ.get("TG_CHAT_ID", ""))
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """按行切分长消息 (不拆开单行内的 HTML 标签)，超长单行再硬切"""
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def send_telegram_message(message: str, parse_mode: str = "HTML", session_pool: Optional["HTTPSessionPool"] = None,
+                          retries: int = 0, backoff: float = 1.0):
+    """发送Telegram消息 (复用会话池连接；超过 4096 字符自动分段，失败按指数退避重试)"""
     bot_token = os.environ.get("TG_BOT_TOKEN", "")
     chat_id = os.environ.get("TG_CHAT_ID", "")
     
@@ -68,25 +144,151 @@ def send_telegram_message(message: str, parse_mode: str = "HTML"):
         logging.warning("⚠️  TG_BOT_TOKEN 或 TG_CHAT_ID 未配置，跳过TG推送")
         return False
     
-    try:
-        import requests as py_requests
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    pool = session_pool or get_shared_session_pool()
+    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    chunks = split_message(message)
+    for index, chunk in enumerate(chunks, 1):
         data = {
             "chat_id": chat_id,
-            "text": message,
+            "text": chunk,
             "parse_mode": parse_mode
         }
         
-        response = py_requests.post(url, json=data, timeout=10)
-        if response.status_code == 200:
-            logging.info("✅ TG消息发送成功")
-            return True
+        for attempt in range(retries + 1):
+            delay = backoff * (2 ** attempt)
+            try:
+                with METRICS.span("notify", channel="telegram"):
+                    response = pool.request("POST", url, json=data, timeout=10, impersonate=False)
+                METRICS.increment("notification", channel="telegram", outcome="ok" if response.status_code == 200 else "error")
+                if response.status_code == 200:
+                    break
+                logging.error(f"❌ TG消息发送失败: {response.status_code}")
+                if response.status_code == 429:
+                    # 遵循 Telegram 返回的限流等待时间
+                    try:
+                        delay = max(delay, float(response.json().get("parameters", {}).get("retry_after", 0)))
+                    except Exception:
+                        pass
+                elif 400 <= response.status_code < 500:
+                    return False  # 参数或权限错误，重试无意义
+            except Exception as e:
+                logging.error(f"❌ TG推送异常: {str(e)}")
+            if attempt < retries:
+                time.sleep(delay)
         else:
-            logging.error(f"❌ TG消息发送失败: {response.status_code}")
             return False
-    except Exception as e:
-        logging.error(f"❌ TG推送异常: {str(e)}")
-        return False
+        if len(chunks) > 1:
+            logging.info(f"✅ TG消息分段发送 {index}/{len(chunks)}")
+    
+    logging.info("✅ TG消息发送成功")
+    return True
+
+class NotificationQueue:
+    """异步通知队列 (后台线程批量发送，不阻塞签到主流程)
+    
+    单账户事件按标题合并为一条 send() 调用；Telegram 消息逐条投递，
+    复用会话池中的同一个连接。close() 时清空队列后退出。
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, config: Dict[str, Any], session_pool: Optional["HTTPSessionPool"] = None):
+        self.batch_size = config.get('notify_batch_size', 20)
+        self.batch_interval = config.get('notify_batch_interval', 2.0)
+        self.retries = config.get('notify_retries', 3)
+        self.session_pool = session_pool
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.failed = 0
+        
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+                self._thread.start()
+    
+    def notify(self, title: str, content: str) -> None:
+        """加入单账户通知事件 (notify 模块)"""
+        if not NOTIFICATION_AVAILABLE:
+            return
+        self._ensure_started()
+        self._queue.put(("notify", title, content))
+    
+    def telegram(self, message: str, parse_mode: str = "HTML") -> bool:
+        """加入 Telegram 消息，返回是否已入队"""
+        if not telegram_configured():
+            logging.warning("⚠️  TG_BOT_TOKEN 或 TG_CHAT_ID 未配置，跳过TG推送")
+            return False
+        self._ensure_started()
+        self._queue.put(("telegram", message, parse_mode))
+        return True
+    
+    def _collect(self) -> Tuple[List[Tuple], bool]:
+        """收集一批事件: 达到批量上限或等待超时即返回"""
+        batch = []
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+    
+    def _deliver_notify(self, title: str, contents: List[str]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                with METRICS.span("notify", channel="notify"):
+                    send(title, "\n".join(contents))
+                METRICS.increment("notification", channel="notify", outcome="ok")
+                self.delivered += 1
+                return
+            except Exception as e:
+                logging.warning(f"⚠️  通知发送失败: {str(e)}")
+                if attempt < self.retries:
+                    time.sleep(2 ** attempt)
+        METRICS.increment("notification", channel="notify", outcome="error")
+        self.failed += 1
+    
+    def _flush(self, batch: List[Tuple]) -> None:
+        grouped: Dict[str, List[str]] = {}
+        for kind, first, second in batch:
+            if kind == "notify":
+                grouped.setdefault(first, []).append(second)
+        for title, contents in grouped.items():
+            self._deliver_notify(title, contents)
+        
+        for kind, message, parse_mode in batch:
+            if kind != "telegram":
+                continue
+            if send_telegram_message(message, parse_mode, self.session_pool, retries=self.retries):
+                self.delivered += 1
+            else:
+                self.failed += 1
+    
+    def _worker(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._flush(batch)
+    
+    def close(self, timeout: float = 120) -> None:
+        """发送剩余通知并停止后台线程"""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(self._STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logging.warning("⚠️  通知队列未能在超时前发送完毕")
+        with self._lock:
+            self._thread = None
 
 # 配置日志
 logging.basicConfig(
@@ -95,6 +297,28 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+class ErrorClass(str, Enum):
+    """签到失败分类 (决定重试与升级策略)"""
+    NONE = "none"              # 成功
+    TRANSIENT = "transient"    # 超时、连接重置、5xx、429: 原路重试即可
+    BLOCKED = "blocked"        # Cloudflare 403 等结构性拦截: 升级到更强的方法
+    AUTH = "auth"              # Cookie 过期: 终态，任何方法都无效
+    REJECTED = "rejected"      # 服务端业务拒绝: 重试或换方法都无意义
+    UNKNOWN = "unknown"        # 未分类
+
+def classify_exception(error: BaseException) -> ErrorClass:
+    """请求异常分类: 超时与连接类错误视为瞬时错误"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return ErrorClass.TRANSIENT
+    name = type(error).__name__.lower()
+    text = str(error).lower()
+    if any(key in name for key in ("timeout", "connection", "proxyerror")):
+        return ErrorClass.TRANSIENT
+    if any(key in text for key in ("timed out", "timeout", "connection reset", "connection refused",
+                                   "connection aborted", "recv failure", "couldn't connect")):
+        return ErrorClass.TRANSIENT
+    return ErrorClass.UNKNOWN
+
 @dataclass
 class SigninResult:
     """签到结果数据类"""
@@ -103,6 +327,18 @@ class SigninResult:
     method: str  # 'http', 'proxy', 'selenium'
     cookie_expired: bool = False  # Cookie是否过期
     statistics: Optional[Dict] = None
+    error_class: ErrorClass = ErrorClass.NONE
+    gain: Optional[int] = None      # 本次签到获得的鸡腿 (接口返回时)
+    current: Optional[int] = None   # 签到后的鸡腿总数
+    latency: float = 0.0            # 签到耗时 (秒，不含统计查询)
+    
+    def __post_init__(self):
+        # 未显式分类的失败按 Cookie 过期 / 未知处理 (兼容从分片结果文件恢复的字符串值)
+        self.error_class = ErrorClass(self.error_class)
+        if self.cookie_expired:
+            self.error_class = ErrorClass.AUTH
+        elif not self.success and self.error_class == ErrorClass.NONE:
+            self.error_class = ErrorClass.UNKNOWN
 
 @dataclass  
 class AccountConfig:
@@ -112,6 +348,9 @@ class AccountConfig:
     cookie: str
     username: str = ""
     password: str = ""
+    proxy_url: str = ""                            # 账户专属代理 (覆盖 PROXY_URL)
+    random_mode: Optional[bool] = None             # 账户专属签到模式 (覆盖 NS_RANDOM)
+    method_preference: Optional[List[str]] = None  # 账户专属方法顺序 (如 ['selenium'])
 
 class EnvironmentDetector:
     """环境检测器"""
@@ -140,10 +379,80 @@ class EnvironmentDetector:
             'environment': env_type,
             'enable_statistics': os.environ.get("ENABLE_STATISTICS", "true").lower() == "true",
             'enable_selenium': os.environ.get("ENABLE_SELENIUM", "auto"),
-            'proxy_url': os.environ.get("PROXY_URL", ""),
+            'proxy_url': os.environ.get("PROXY_URL", ""),  # 可配置多个代理 (逗号 / 换行分隔)
+            'proxy_check_url': os.environ.get("NS_PROXY_CHECK_URL", ""),
+            'proxy_check_interval': float(os.environ.get("NS_PROXY_CHECK_INTERVAL", "60")),
+            'proxy_evict_seconds': float(os.environ.get("NS_PROXY_EVICT", "300")),
+            'selenium_proxy': os.environ.get("NS_SELENIUM_PROXY", "true").lower() == "true",
             'random_mode': os.environ.get("NS_RANDOM", "false").lower() == "true",
             'headless': os.environ.get("HEADLESS", "true").lower() == "true",
             'timeout': int(os.environ.get("TIMEOUT", "30")),
+            'base_url': os.environ.get("NS_BASE_URL", NODESEEK_BASE_URL).rstrip("/"),
+            # 常驻模式: 每日签到窗口 (本地时间)、状态接口地址 (端口 0 为关闭)、是否预热浏览器
+            'daemon_window': os.environ.get("NS_DAEMON_WINDOW", "08:00-10:00"),
+            'daemon_host': os.environ.get("NS_DAEMON_HOST", "127.0.0.1"),
+            'daemon_port': int(os.environ.get("NS_DAEMON_PORT", "8787")),
+            'daemon_warm_browser': os.environ.get("NS_DAEMON_WARM_BROWSER", "false").lower() == "true",
+            # HTTP 录像: record 录制 / replay 离线回放 (speed 缩放回放耗时，0 为不等待)
+            'cassette': os.environ.get("NS_CASSETTE", ""),
+            'cassette_mode': os.environ.get("NS_CASSETTE_MODE", "").lower(),
+            'cassette_speed': float(os.environ.get("NS_CASSETTE_SPEED", "1.0")),
+            # TLS 指纹: 指定 curl_cffi impersonate 目标 (为空时自动探测并缓存)
+            'impersonate': os.environ.get("NS_IMPERSONATE", ""),
+            'fingerprint_ttl': float(os.environ.get("NS_FINGERPRINT_TTL", "86400")),
+            'concurrency': os.environ.get("NS_CONCURRENCY", "serial").lower(),  # serial / thread / asyncio
+            'max_workers': max(1, int(os.environ.get("NS_MAX_WORKERS", "4"))),
+            'host_concurrency': max(1, int(os.environ.get("NS_HOST_CONCURRENCY", "4"))),
+            'selenium_concurrency': max(1, int(os.environ.get("NS_SELENIUM_CONCURRENCY", "1"))),
+            'browser_max_uses': max(1, int(os.environ.get("NS_BROWSER_MAX_USES", "20"))),
+            'cache_dir': os.environ.get("NS_CACHE_DIR", ".nodeseek_cache"),
+            'metrics_dir': os.environ.get("NS_METRICS_DIR", ""),
+            # 签到历史: 追加写入的逐账户记录 (为空则关闭)，超过 NS_HISTORY_RAW_DAYS 的明细压缩为每日汇总
+            'history_file': os.environ.get(
+                "NS_HISTORY_FILE", os.path.join(os.environ.get("NS_CACHE_DIR", ".nodeseek_cache"), "history.jsonl")
+            ),
+            'history_raw_days': max(1, int(os.environ.get("NS_HISTORY_RAW_DAYS", "30"))),
+            'report_file': os.environ.get("NS_REPORT_FILE", ""),  # 本次运行的结构化 JSON 报告
+            'preflight': os.environ.get("NS_PREFLIGHT", "false").lower() == "true",
+            'accounts_file': os.environ.get("NS_ACCOUNTS_FILE", ""),
+            # 分片: "i/N" 表示只处理第 i 个分片 (从 0 开始)，部分结果写入 shard_dir 供 --merge 汇总
+            'shard': os.environ.get("NS_SHARD", ""),
+            'shard_dir': os.environ.get("NS_SHARD_DIR", "shard_results"),
+            'notify_batch_size': max(1, int(os.environ.get("NS_NOTIFY_BATCH", "20"))),
+            'notify_batch_interval': float(os.environ.get("NS_NOTIFY_INTERVAL", "2")),
+            'notify_retries': max(0, int(os.environ.get("NS_NOTIFY_RETRIES", "3"))),
+            'force_signin': os.environ.get("NS_FORCE", "false").lower() == "true",
+            'adaptive_routing': os.environ.get("NS_ADAPTIVE_ROUTING", "true").lower() == "true",
+            'router_explore_rate': float(os.environ.get("NS_ROUTER_EXPLORE", "0.1")),
+            # 节奏策略: 每个主机的令牌桶速率 / 突发量 / 随机抖动上限
+            'rate_limit': float(os.environ.get("NS_RATE_LIMIT", "1.0")),
+            'rate_burst': max(1, int(os.environ.get("NS_RATE_BURST", "2"))),
+            'rate_jitter': float(os.environ.get("NS_RATE_JITTER", "0.5")),
+            # 对冲: 直连超过该秒数未响应时并行发起代理签到 (0 为关闭)
+            'hedge_delay': float(os.environ.get("NS_HEDGE_DELAY", "8")),
+            # 对冲双方单次请求的超时上限 (同步会话无法中途取消，输掉的一方最多再占用名额这么久)
+            'hedge_timeout': float(os.environ.get("NS_HEDGE_TIMEOUT") or 2 * float(os.environ.get("NS_HEDGE_DELAY", "8"))),
+            # 熔断: 连续 N 次 Cloudflare 拦截后本次运行跳过该方法 (0 为关闭)，冷却后半开探测
+            'breaker_threshold': int(os.environ.get("NS_BREAKER_THRESHOLD", "3")),
+            'breaker_cooldown': float(os.environ.get("NS_BREAKER_COOLDOWN", "300")),
+            # 重试策略: 按错误分类的重试次数 / 可升级方法的分类 / 退避 / 重试预算
+            'retry_policy': os.environ.get("NS_RETRY_POLICY", "transient=2"),
+            'retry_escalate': os.environ.get("NS_RETRY_ESCALATE", "blocked,unknown"),
+            'retry_backoff': float(os.environ.get("NS_RETRY_BACKOFF", "1.0")),
+            'retry_max_backoff': float(os.environ.get("NS_RETRY_MAX_BACKOFF", "10")),
+            'retry_budget': float(os.environ.get("NS_RETRY_BUDGET", "0.2")),
+            # clearance 交接: 浏览器通过一次 Cloudflare 质询，其余账户复用 cf_clearance 走 HTTP
+            'clearance_handoff': os.environ.get("NS_CLEARANCE", "true").lower() == "true",
+            'clearance_ttl': float(os.environ.get("NS_CLEARANCE_TTL", "1800")),
+            'clearance_retry': float(os.environ.get("NS_CLEARANCE_RETRY", "300")),  # 质询失败后的冷却时间 (秒)
+            # 轻量浏览器: eager 加载 + 屏蔽图片/字体/媒体/统计脚本 + CDP 预置 Cookie
+            'selenium_lite': os.environ.get("NS_SELENIUM_LITE", "true").lower() == "true",
+            'selenium_block': os.environ.get("NS_SELENIUM_BLOCK", ""),  # 额外屏蔽的 URL 模式 (逗号分隔)
+            # 进程隔离: 每个浏览器运行在独立工作进程中，超时 / 内存超限时连同 Chrome 整组终止
+            'selenium_isolate': os.environ.get("NS_SELENIUM_ISOLATE", "true").lower() == "true",
+            'selenium_task_timeout': float(os.environ.get("NS_SELENIUM_TASK_TIMEOUT", "180")),
+            'selenium_rss_mb': float(os.environ.get("NS_SELENIUM_RSS_MB", "1536")),  # 0 为不限制
+            'selenium_admit_mb': float(os.environ.get("NS_SELENIUM_ADMIT_MB", "1024")),  # 启动新浏览器所需可用内存
         }
         
         # GitHub Actions 特定优化
@@ -155,64 +464,1609 @@ class EnvironmentDetector:
         
         return config
 
+@contextmanager
+def atomic_write(path: str):
+    """原子写入文本文件: 先写 .tmp 再替换，读取方不会看到写了一半的文件 (自动创建目录)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class RunMetrics:
+    """运行指标 (各阶段耗时聚合 + 事件计数，可导出 JSON / Prometheus textfile)"""
+    
+    PREFIX = "nodeseek"
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        
+    def reset(self) -> None:
+        """开始新一轮运行时清空"""
+        with self._lock:
+            self.started_at = time.time()
+            self._spans: Dict[Tuple, List[float]] = {}  # (阶段, 标签) -> [次数, 总耗时, 最小, 最大]
+            self._counters: Dict[Tuple, float] = {}
+    
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    
+    def observe(self, stage: str, seconds: float, **labels) -> None:
+        """记录一次阶段耗时"""
+        key = self._key(stage, labels)
+        with self._lock:
+            entry = self._spans.get(key)
+            if entry is None:
+                self._spans[key] = [1, seconds, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = min(entry[2], seconds)
+                entry[3] = max(entry[3], seconds)
+    
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """计时上下文 (异常时同样记录)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+    
+    def increment(self, event: str, value: float = 1, **labels) -> None:
+        """事件计数 (签到结果、fallback 次数等)"""
+        key = self._key(event, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [
+                {'stage': name, 'labels': dict(labels), 'count': int(entry[0]),
+                 'total': round(entry[1], 6), 'avg': round(entry[1] / entry[0], 6),
+                 'min': round(entry[2], 6), 'max': round(entry[3], 6)}
+                for (name, labels), entry in sorted(self._spans.items())
+            ]
+            counters = [
+                {'event': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            'duration': round(time.time() - self.started_at, 3),
+            'spans': spans,
+            'counters': counters,
+        }
+    
+    @staticmethod
+    def _prom_labels(labels: Dict[str, str]) -> str:
+        if not labels:
+            return ""
+        escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                   for k, v in labels.items())
+        return "{" + ",".join(escaped) + "}"
+    
+    def to_prometheus(self) -> str:
+        """Prometheus textfile 格式 (node_exporter textfile collector)"""
+        data = self.to_dict()
+        p = self.PREFIX
+        lines = [
+            f"# HELP {p}_stage_duration_seconds Time spent per sign-in stage.",
+            f"# TYPE {p}_stage_duration_seconds summary",
+        ]
+        for span in data['spans']:
+            labels = self._prom_labels({'stage': span['stage'], **span['labels']})
+            lines.append(f"{p}_stage_duration_seconds_sum{labels} {span['total']}")
+            lines.append(f"{p}_stage_duration_seconds_count{labels} {span['count']}")
+        lines += [
+            f"# HELP {p}_stage_duration_max_seconds Slowest observation per stage in this run.",
+            f"# TYPE {p}_stage_duration_max_seconds gauge",
+        ]
+        for span in data['spans']:
+            labels = self._prom_labels({'stage': span['stage'], **span['labels']})
+            lines.append(f"{p}_stage_duration_max_seconds{labels} {span['max']}")
+        lines += [
+            f"# HELP {p}_events_total Sign-in events (results, fallbacks, notifications).",
+            f"# TYPE {p}_events_total counter",
+        ]
+        for counter in data['counters']:
+            labels = self._prom_labels({'event': counter['event'], **counter['labels']})
+            lines.append(f"{p}_events_total{labels} {counter['value']}")
+        lines += [
+            f"# HELP {p}_run_duration_seconds Wall time of the last run.",
+            f"# TYPE {p}_run_duration_seconds gauge",
+            f"{p}_run_duration_seconds {data['duration']}",
+            f"# HELP {p}_run_timestamp_seconds Start time of the last run.",
+            f"# TYPE {p}_run_timestamp_seconds gauge",
+            f"{p}_run_timestamp_seconds {round(self.started_at, 3)}",
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def export(self, directory: str) -> None:
+        """写出 metrics.json 与 nodeseek.prom"""
+        with atomic_write(os.path.join(directory, "metrics.json")) as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        with atomic_write(os.path.join(directory, f"{self.PREFIX}.prom")) as f:
+            f.write(self.to_prometheus())
+    
+    def summary(self, top: int = 8) -> str:
+        """按总耗时排序的阶段摘要 (用于日志)"""
+        spans = sorted(self.to_dict()['spans'], key=lambda span: span['total'], reverse=True)[:top]
+        return " | ".join(
+            f"{span['stage']}{'/' + ','.join(span['labels'].values()) if span['labels'] else ''}"
+            f" {span['total']:.2f}s×{span['count']}"
+            for span in spans
+        )
+
+# 进程级指标注册表 (每次 run 开始时重置)
+METRICS = RunMetrics()
+
+def endpoint_label(url: str) -> str:
+    """URL → 指标标签 (仅取末段路径并归一化数字，避免泄露 Token)"""
+    segment = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1] or "/"
+    return re.sub(r"\d+", "N", segment)
+
+class ConcurrencyLimiter:
+    """并发限制器 (按出口线路 + 主机限流，Selenium 单独限流)"""
+    
+    def __init__(self, host_limit: int = 4, selenium_limit: int = 1):
+        self.host_limit = max(1, host_limit)
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._selenium = threading.BoundedSemaphore(max(1, selenium_limit))
+        
+    def host(self, url: str, proxy_url: str = "") -> threading.BoundedSemaphore:
+        """获取目标主机的并发信号量 (直连与各代理分别计数，互不阻塞)"""
+        host = f"{proxy_url}|{urlparse(url).netloc}"
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.host_limit)
+            return self._host_semaphores[host]
+    
+    def selenium(self) -> threading.BoundedSemaphore:
+        """获取 Selenium 并发信号量"""
+        return self._selenium
+
+def cookie_fingerprint(cookie: str) -> str:
+    """Cookie 指纹 (用于区分账户，不暴露原始 Cookie)"""
+    return hashlib.sha256(cookie.encode("utf-8")).hexdigest()[:16]
+
+class FingerprintProfiles:
+    """TLS 指纹配置管理 (curl_cffi impersonate 目标 + 匹配的 User-Agent)
+    
+    首次使用时按从新到旧探测本地 curl_cffi 支持的 Chrome 目标，
+    取第一个能正常完成请求的目标，连同版本一致的 User-Agent 缓存到磁盘 (带有效期)，
+    之后所有会话直接使用，不再对失败请求做无指纹的盲目重发。
+    探测在锁外进行，进行中其他请求先使用首选目标；全部目标失败的结果按 FAILED_TTL 短期缓存，
+    避免每次运行都重新向 Cloudflare 发起整轮探测。
+    """
+    
+    CANDIDATES = ("chrome136", "chrome131", "chrome124", "chrome120", "chrome116", "chrome110")
+    FAILED_TTL = 3600.0  # 探测全部失败时，首选目标的缓存有效期 (秒)
+    UA_TEMPLATE = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version}.0.0.0 Safari/537.36"
+    
+    def __init__(self, path: str = "", ttl: float = 86400.0, probe_url: str = NODESEEK_BASE_URL,
+                 forced_target: str = "", timeout: float = 10.0, offline: bool = False):
+        self.path = path
+        self.offline = offline  # 离线 (录像回放) 时不探测
+        self.ttl = ttl
+        self.probe_url = probe_url
+        self.forced_target = forced_target
+        self.timeout = timeout
+        self._profile: Optional[Dict[str, Any]] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FingerprintProfiles":
+        cache_dir = config.get('cache_dir')
+        return cls(
+            os.path.join(cache_dir, "fingerprint.json") if cache_dir else "",
+            ttl=config.get('fingerprint_ttl', 86400.0),
+            probe_url=config.get('base_url', NODESEEK_BASE_URL),
+            forced_target=config.get('impersonate', ""),
+            timeout=min(config.get('timeout', 30), 10),
+            offline=config.get('cassette_mode') == "replay",
+        )
+    
+    @classmethod
+    def profile_for(cls, target: Optional[str]) -> Dict[str, Any]:
+        version = re.search(r"\d+", target or "")
+        user_agent = cls.UA_TEMPLATE.format(version=version.group()) if version else DEFAULT_USER_AGENT
+        return {'target': target, 'user_agent': user_agent}
+    
+    @staticmethod
+    def supported_targets() -> List[str]:
+        """本地 curl_cffi 支持的 impersonate 目标"""
+        if not USE_CURL_CFFI:
+            return []
+        try:
+            from curl_cffi.requests import BrowserType
+            return [item.value for item in BrowserType]
+        except Exception:
+            return []
+    
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl = self.FAILED_TTL if cached.get('failed') else self.ttl
+        if time.time() - cached.get('probed_at', 0) > ttl:
+            return None
+        if cached.get('target') and cached['target'] not in self.supported_targets():
+            return None  # curl_cffi 版本变化
+        return cached
+    
+    def _save(self, profile: Dict[str, Any]) -> None:
+        if not self.path:
+            return
+        try:
+            with atomic_write(self.path) as f:
+                json.dump(profile, f, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"⚠️  指纹配置缓存写入失败: {str(e)}")
+    
+    def candidates(self) -> List[str]:
+        """本地 curl_cffi 支持的候选目标 (从新到旧)"""
+        supported = self.supported_targets()
+        return [target for target in self.CANDIDATES if target in supported]
+    
+    def fallback(self) -> Dict[str, Any]:
+        """首选目标 (探测进行中或全部失败时使用)"""
+        candidates = self.candidates()
+        return self.profile_for(candidates[0] if candidates else None)
+    
+    def probe(self) -> Dict[str, Any]:
+        """探测可用的 impersonate 目标 (被 Cloudflare 403 / 质询页拦截的目标视为不可用)"""
+        candidates = self.candidates()
+        if not candidates:
+            return self.profile_for(None)
+        if self.offline:
+            return self.profile_for(candidates[0])
+        
+        backend = get_http_backend()
+        for target in candidates:
+            try:
+                with METRICS.span("fingerprint_probe", target=target):
+                    response = backend.request("GET", self.probe_url, impersonate=target,
+                                               timeout=self.timeout, allow_redirects=False)
+                    blocked = response.status_code == 403 or HTTPSigner.is_challenge(response.text)
+                    response.close()
+            except Exception as e:
+                logging.debug(f"指纹目标 {target} 探测失败: {str(e)}")
+                continue
+            if blocked:
+                logging.debug(f"指纹目标 {target} 被 Cloudflare 拦截")
+                METRICS.increment("fingerprint_blocked", target=target)
+                continue
+            profile = dict(self.profile_for(target), probed_at=time.time())
+            self._save(profile)
+            logging.info(f"🧬 TLS 指纹: {target}")
+            return profile
+        
+        # 全部失败 (网络问题或整段出口被拦截): 使用首选目标，短期缓存该结果
+        profile = dict(self.profile_for(candidates[0]), probed_at=time.time(), failed=True)
+        self._save(profile)
+        logging.warning(f"⚠️  指纹探测均失败，使用 {candidates[0]} ({self.FAILED_TTL:g}s 内不再探测)")
+        return profile
+    
+    def get(self) -> Dict[str, Any]:
+        """当前使用的指纹配置 {'target', 'user_agent'}"""
+        with self._lock:
+            if self._profile is not None:
+                return self._profile
+            if not USE_CURL_CFFI:
+                self._profile = self.profile_for(None)
+                return self._profile
+            if self.forced_target:
+                self._profile = self.profile_for(self.forced_target)
+                return self._profile
+            if self._probing:
+                # 其他线程正在探测: 不等待，先使用首选目标
+                return self.fallback()
+            cached = self._load()
+            if cached:
+                self._profile = cached
+                return cached
+            self._probing = True
+        try:
+            profile = self.probe()
+        finally:
+            with self._lock:
+                self._probing = False
+        with self._lock:
+            self._profile = profile
+            return profile
+    
+    @property
+    def target(self) -> Optional[str]:
+        return self.get()['target']
+    
+    @property
+    def user_agent(self) -> str:
+        return self.get()['user_agent']
+
+class CassetteMiss(Exception):
+    """回放模式下录像中没有匹配的请求"""
+
+class CassetteResponse:
+    """录像回放的响应 (提供签到流程用到的 requests 风格接口)"""
+    
+    def __init__(self, status_code: int, headers: Dict[str, str], text: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.content = text.encode("utf-8")
+        
+    def json(self) -> Any:
+        return json.loads(self.text)
+    
+    def close(self) -> None:
+        pass
+
+class HTTPCassette:
+    """HTTP 录像 (record: 录制脱敏后的请求/响应与真实耗时；replay: 离线按录像回放)
+    
+    请求按 (方法, 脱敏 URL, 账户指纹) 匹配，同一请求按录制顺序依次回放；
+    账户指纹不匹配时 (如换了一组 Cookie) 退回到只按方法与 URL 匹配。
+    Cookie、Telegram Token 与 Chat ID 不写入录像。
+    """
+    
+    KEPT_HEADERS = ("content-type", "location", "retry-after")
+    
+    def __init__(self, path: str, mode: str, speed: float = 1.0, secrets: Iterable[str] = ()):
+        self.path = path
+        self.mode = mode
+        self.speed = max(0.0, speed)
+        self._secrets = {secret for secret in secrets if secret and len(secret) >= 4}
+        self._entries: List[Dict[str, Any]] = []
+        self._queues: Dict[Tuple[str, ...], deque] = {}
+        self._lock = threading.Lock()
+        if self.replaying:
+            self._load()
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["HTTPCassette"]:
+        mode = config.get('cassette_mode', "")
+        if mode not in ("record", "replay") or not config.get('cassette'):
+            return None
+        secrets = (os.environ.get("TG_BOT_TOKEN", ""), os.environ.get("TG_CHAT_ID", ""))
+        return cls(config['cassette'], mode, config.get('cassette_speed', 1.0), secrets)
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+    
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+    
+    def _load(self) -> None:
+        with self._open("r") as f:
+            for line in f:
+                if line.strip():
+                    # 同一条录像同时进入 "按账户" 与 "仅方法 + URL" 两个队列，
+                    # 通过共享的 consumed 标记保证只被取走一次
+                    entry = json.loads(line)
+                    entry['consumed'] = False
+                    for key in (self._key(entry['method'], entry['url'], entry.get('account', "")),
+                                self._key(entry['method'], entry['url'])):
+                        self._queues.setdefault(key, deque()).append(entry)
+        logging.info(f"📼 HTTP 录像回放: {self.path}")
+    
+    @staticmethod
+    def _key(method: str, url: str, account: Optional[str] = None) -> Tuple[str, ...]:
+        return (method.upper(), url) if account is None else (method.upper(), url, account)
+    
+    def redact(self, text: str, extra: Iterable[str] = ()) -> str:
+        """去除 Telegram Bot Token、Chat ID 与 Cookie 值"""
+        text = re.sub(r"/bot[^/]+/", "/bot<redacted>/", text)
+        for secret in sorted(self._secrets.union(extra), key=len, reverse=True):
+            text = text.replace(secret, "<redacted>")
+        return text
+    
+    @staticmethod
+    def cookie_values(headers: Optional[Dict[str, str]]) -> List[str]:
+        cookie = (headers or {}).get('Cookie', "")
+        values = [item.split("=", 1)[1].strip() for item in cookie.split(";") if "=" in item]
+        return [value for value in values if len(value) >= 4]
+    
+    def record(self, method: str, url: str, account: str, latency: float, kwargs: Dict[str, Any],
+               response: Any = None, error: Optional[BaseException] = None) -> None:
+        extra = self.cookie_values(kwargs.get('headers'))
+        entry = {'method': method.upper(), 'url': self.redact(url, extra), 'account': account,
+                 'latency': round(latency, 4)}
+        if error is not None:
+            entry['error'] = self.redact(str(error), extra)
+            entry['transient'] = classify_exception(error) == ErrorClass.TRANSIENT
+        else:
+            entry['status'] = response.status_code
+            entry['headers'] = {name: value for name, value in response.headers.items()
+                                if name.lower() in self.KEPT_HEADERS}
+            entry['body'] = self.redact(response.text, extra)
+        with self._lock:
+            self._entries.append(entry)
+    
+    @staticmethod
+    def _take(queue: Optional[deque], reuse: bool = False) -> Optional[Dict[str, Any]]:
+        """取出队列中下一条未被使用的录像 (最后一条保留在队列中)
+        
+        reuse 为 False 时不返回已被使用的录像；为 True 时允许重复使用最后一条。
+        """
+        if not queue:
+            return None
+        while len(queue) > 1 and queue[0]['consumed']:
+            queue.popleft()
+        if queue[0]['consumed'] and not reuse:
+            return None
+        entry = queue.popleft() if len(queue) > 1 else queue[0]
+        entry['consumed'] = True
+        return entry
+    
+    def replay(self, method: str, url: str, account: str = "") -> CassetteResponse:
+        """按录像返回响应 (按 speed 缩放真实耗时)，同一请求的最后一条录像可重复使用"""
+        url = self.redact(url)
+        with self._lock:
+            # 优先使用未被取走的录像 (先按账户，再按方法 + URL)，都已用完时才重复使用最后一条
+            queues = (self._queues.get(self._key(method, url, account)), self._queues.get(self._key(method, url)))
+            entry = None
+            for reuse in (False, True):
+                for queue in queues:
+                    entry = entry or self._take(queue, reuse)
+            if entry is None:
+                raise CassetteMiss(f"录像中没有匹配的请求: {method.upper()} {url}")
+        if self.speed > 0:
+            time.sleep(entry['latency'] * self.speed)
+        if 'error' in entry:
+            raise (TimeoutError if entry.get('transient') else RuntimeError)(entry['error'])
+        return CassetteResponse(entry['status'], entry.get('headers', {}), entry.get('body', ""))
+    
+    def save(self) -> None:
+        """写出录像 (仅录制模式)"""
+        if not self.recording:
+            return
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._open("w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        logging.info(f"📼 HTTP 录像已保存: {self.path} ({len(entries)} 条)")
+
+class RequestCancelled(Exception):
+    """请求已被取消 (如对冲请求的另一条线路已得到结果)"""
+
+class HTTPSessionPool:
+    """HTTP 会话池 (直连池 / 代理池分离，复用 keep-alive 连接)
+    
+    会话在账户之间复用，发送请求时会话 Cookie Jar 始终为空 (curl_cffi 在 Jar 非空时
+    会忽略显式的 Cookie 请求头)。服务端下发的 Cookie (如 __cf_bm) 按账户记录，
+    之后合并进该账户的 Cookie 请求头发送。
+    """
+    
+    MAX_ACCOUNT_COOKIES = 1024  # 最多记录多少个账户的服务端 Cookie (LRU)
+    
+    def __init__(self, config: Dict[str, Any], limiter: Optional[ConcurrencyLimiter] = None,
+                 scheduler: Optional["RateLimitScheduler"] = None, profiles: Optional[FingerprintProfiles] = None):
+        self.config = config
+        self.profiles = profiles or FingerprintProfiles.from_config(config)
+        self.cassette = HTTPCassette.from_config(config)
+        self.limiter = limiter or ConcurrencyLimiter(config.get('host_concurrency', 4))
+        self.scheduler = scheduler or RateLimitScheduler.from_config(config)
+        self.max_idle = self.limiter.host_limit * 2
+        self._idle: Dict[str, List[Any]] = {}
+        self._account_cookies: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 当前线程关联的取消事件
+        
+    @staticmethod
+    def _pool_key(proxy_url: str) -> str:
+        return f"proxy:{proxy_url}" if proxy_url else "direct"
+    
+    def _new_session(self, proxy_url: str):
+        METRICS.increment("session_created", route="proxy" if proxy_url else "direct")
+        session = get_http_backend().Session()
+        if proxy_url and hasattr(session, 'proxies'):
+            session.proxies.update({'http': proxy_url, 'https': proxy_url})
+        return session
+    
+    def _acquire(self, proxy_url: str):
+        key = self._pool_key(proxy_url)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return self._new_session(proxy_url)
+    
+    def _release(self, proxy_url: str, session) -> None:
+        key = self._pool_key(proxy_url)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(session)
+                return
+        session.close()
+    
+    @contextmanager
+    def session(self, account_key: str = "", proxy_url: str = ""):
+        """借出会话 (Cookie Jar 为空)，归还前把服务端下发的 Cookie 记入该账户"""
+        session = self._acquire(proxy_url)
+        empty_jar = type(session.cookies)
+        session.cookies = empty_jar()
+        try:
+            yield session
+        finally:
+            if account_key:
+                self._remember_cookies(account_key, session.cookies)
+            session.cookies = empty_jar()
+            self._release(proxy_url, session)
+    
+    def _remember_cookies(self, account_key: str, jar) -> None:
+        try:
+            received = {name: value for name, value in jar.items() if value is not None}
+        except Exception:
+            return
+        if not received:
+            return
+        with self._lock:
+            self._account_cookies.setdefault(account_key, {}).update(received)
+            self._account_cookies.move_to_end(account_key)
+            while len(self._account_cookies) > self.MAX_ACCOUNT_COOKIES:
+                self._account_cookies.popitem(last=False)
+    
+    def _with_account_cookies(self, account_key: str, headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """把记录的服务端 Cookie 合并进显式 Cookie 请求头"""
+        if not account_key or not headers or not headers.get('Cookie'):
+            return headers
+        with self._lock:
+            received = dict(self._account_cookies.get(account_key) or {})
+        if not received:
+            return headers
+        cookie = headers['Cookie']
+        for name, value in received.items():
+            cookie = merge_cookie(cookie, name, value)
+        return dict(headers, Cookie=cookie)
+    
+    @contextmanager
+    def cancellable(self, cancelled: Optional[threading.Event]):
+        """当前线程内发出的请求关联取消事件 (对冲请求)
+        
+        同步会话无法中途中止进行中的传输 (curl_cffi 的 curl 句柄按线程隔离，跨线程关闭无效)，
+        因此取消只阻止尚未发出的请求；已发出的请求单次超时被限制在 hedge_timeout 内，
+        并一直占用主机并发名额直到传输真正结束。
+        """
+        previous = getattr(self._local, "cancelled", None)
+        self._local.cancelled = cancelled
+        try:
+            yield
+        finally:
+            self._local.cancelled = previous
+    
+    def is_cancelled(self) -> bool:
+        cancelled = getattr(self._local, "cancelled", None)
+        return cancelled is not None and cancelled.is_set()
+    
+    @contextmanager
+    def _host_slot(self, url: str, proxy_url: str):
+        """占用主机并发名额，直到请求结束 (取消后抛出的异常统一转换为 RequestCancelled)"""
+        cancelled = getattr(self._local, "cancelled", None)
+        semaphore = self.limiter.host(url, proxy_url)
+        semaphore.acquire()
+        try:
+            if cancelled is not None and cancelled.is_set():
+                raise RequestCancelled("请求已取消")
+            try:
+                yield
+            except Exception as e:
+                if cancelled is not None and cancelled.is_set():
+                    raise RequestCancelled("请求已取消") from e
+                raise
+        finally:
+            semaphore.release()
+    
+    def request(self, method: str, url: str, account_key: str = "", proxy_url: str = "",
+                impersonate: bool = True, **kwargs):
+        """通过会话池发送请求 (先按主机限速排队，再受主机并发上限约束)"""
+        labels = {'host': urlparse(url).netloc, 'endpoint': endpoint_label(url), 'route': "proxy" if proxy_url else "direct"}
+        with METRICS.span("rate_limit_wait", **labels):
+            self.scheduler.wait(url, proxy_url)
+        if self.cassette and self.cassette.replaying:
+            with self._host_slot(url, proxy_url), METRICS.span("http_request", **labels):
+                return self.cassette.replay(method, url, account_key)
+        target = self.profiles.target if impersonate else None
+        if target:
+            kwargs['impersonate'] = target
+        if getattr(self._local, "cancelled", None) is not None and self.config.get('hedge_timeout'):
+            kwargs['timeout'] = min(kwargs.get('timeout') or self.config['hedge_timeout'], self.config['hedge_timeout'])
+        with self._host_slot(url, proxy_url), self.session(account_key, proxy_url) as session, \
+                METRICS.span("http_request", **labels):
+            if kwargs.get('headers'):
+                kwargs['headers'] = self._with_account_cookies(account_key, kwargs['headers'])
+            started = time.monotonic()
+            try:
+                response = session.request(method, url, **kwargs)
+            except Exception as e:
+                if self.cassette:
+                    self.cassette.record(method, url, account_key, time.monotonic() - started, kwargs, error=e)
+                raise
+            if self.cassette:
+                self.cassette.record(method, url, account_key, time.monotonic() - started, kwargs, response=response)
+            return response
+    
+    def close(self) -> None:
+        """关闭所有空闲会话 (录制模式下写出录像)"""
+        if self.cassette:
+            self.cassette.save()
+        with self._lock:
+            sessions = [session for idle in self._idle.values() for session in idle]
+            self._idle.clear()
+            self._account_cookies.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+_shared_session_pool: Optional[HTTPSessionPool] = None
+_shared_session_pool_lock = threading.Lock()
+
+def get_shared_session_pool() -> HTTPSessionPool:
+    """获取进程级共享会话池 (未显式传入会话池时使用)"""
+    global _shared_session_pool
+    with _shared_session_pool_lock:
+        if _shared_session_pool is None:
+            _shared_session_pool = HTTPSessionPool(EnvironmentDetector.get_env_config())
+        return _shared_session_pool
+
+def parse_ledger_time(value: Any) -> Optional[datetime]:
+    """解析账本记录时间 (ISO 字符串或 Unix 时间戳)，统一为 UTC"""
+    try:
+        if isinstance(value, (int, float)):
+            seconds = value / 1000 if value > 1e12 else value
+            return datetime.fromtimestamp(seconds, tz=timezone.utc)
+        text = str(value).strip().replace("Z", "+00:00")
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+class CreditLedgerCache:
+    """鸡腿账本本地缓存 (SQLite，按账户 + 时间索引)
+    
+    记录格式与 /api/account/credit 返回一致: [数量, 余额, 描述, 时间]。
+    credit_sync 保存每个账户的同步水位: 最近一次完整同步确认连续缓存到的最早时间。
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS credit_ledger (
+            account TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            amount REAL NOT NULL,
+            balance REAL,
+            description TEXT NOT NULL,
+            PRIMARY KEY (account, created_at, description)
+        );
+        CREATE INDEX IF NOT EXISTS idx_credit_ledger_date ON credit_ledger (account, created_at);
+        CREATE TABLE IF NOT EXISTS credit_sync (
+            account TEXT PRIMARY KEY,
+            covered_since TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def _row(record: List[Any]) -> Optional[Tuple[str, float, Any, str]]:
+        if len(record) < 4:
+            return None
+        created_at = parse_ledger_time(record[3])
+        if created_at is None:
+            return None
+        return created_at.strftime("%Y-%m-%dT%H:%M:%S"), record[0], record[1], str(record[2])
+    
+    def add_records(self, account: str, records: List[List[Any]]) -> Tuple[int, int]:
+        """写入一页记录，返回 (新记录数, 有效记录数)"""
+        rows = [row for row in (self._row(record) for record in records) if row]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO credit_ledger (account, created_at, amount, balance, description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(account, *row) for row in rows]
+            )
+            return self._conn.total_changes - before, len(rows)
+    
+    def sync_watermark(self, account: str) -> Optional[datetime]:
+        """返回该账户的同步水位 (未完整同步过返回 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT covered_since FROM credit_sync WHERE account = ?", (account,)
+            ).fetchone()
+        if not row:
+            return None
+        return datetime.strptime(row[0], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    
+    def set_sync_watermark(self, account: str, covered_since: Optional[datetime]) -> None:
+        """更新同步水位 (None 表示清除: 同步未完成前缓存中可能存在缺口)"""
+        with self._lock, self._conn:
+            if covered_since is None:
+                self._conn.execute("DELETE FROM credit_sync WHERE account = ?", (account,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO credit_sync (account, covered_since) VALUES (?, ?)",
+                    (account, covered_since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"))
+                )
+    
+    def signin_amounts(self, account: str, since: datetime) -> List[float]:
+        """查询指定时间之后的签到收益记录"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT amount FROM credit_ledger WHERE account = ? AND created_at >= ? "
+                "AND description LIKE '%签到收益%' ORDER BY created_at DESC",
+                (account, since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"))
+            )
+            return [row[0] for row in cursor.fetchall()]
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class RunStateStore:
+    """运行状态存储 (按 Cookie 指纹记录当日签到结果，重跑时跳过已完成账户)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, str]] = {}
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️  运行状态读取失败，忽略: {str(e)}")
+            
+    @staticmethod
+    def today() -> str:
+        return datetime.now().strftime("%Y-%m-%d")
+    
+    def signed_today(self, cookie: str) -> Optional[Dict[str, str]]:
+        """返回该账户今日的签到记录 (无记录返回 None)"""
+        with self._lock:
+            entry = self._state.get(cookie_fingerprint(cookie))
+        if entry and entry.get("date") == self.today():
+            return entry
+        return None
+    
+    def mark_success(self, cookie: str, method: str) -> None:
+        """记录签到成功时间与方式"""
+        with self._lock:
+            self._state[cookie_fingerprint(cookie)] = {
+                "date": self.today(),
+                "time": datetime.now().strftime("%H:%M:%S"),
+                "method": method,
+            }
+            self._dirty = True
+    
+    def save(self) -> None:
+        """原子写入状态文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            self._dirty = False
+
+def run_record(account: Any, result: SigninResult) -> Dict[str, Any]:
+    """单个账户签到结果的结构化记录 (写入历史与 JSON 报告)"""
+    now = datetime.now()
+    return {
+        'ts': now.isoformat(timespec="seconds"),
+        'date': now.strftime("%Y-%m-%d"),
+        'account': account.display_name,
+        'fingerprint': getattr(account, "fingerprint", ""),
+        'success': result.success,
+        'method': result.method,
+        'error_class': result.error_class.value,
+        'latency': result.latency,
+        'gain': result.gain,
+        'current': result.current,
+        'cookie_expired': result.cookie_expired,
+        'message': result.message,
+        'stats': result.statistics,
+    }
+
+class RunHistory:
+    """签到历史 (追加写入的 JSONL 明细 + 每日汇总)
+    
+    每次运行把逐账户记录追加到明细文件；早于 raw_days 天的明细在追加时
+    压缩进 *_daily.json 的每日汇总，长期趋势查询主要读取汇总，文件大小有界。
+    """
+    
+    def __init__(self, path: str, raw_days: int = 30):
+        self.path = path
+        self.rollup_path = f"{os.path.splitext(path)[0]}_daily.json"
+        self.raw_days = raw_days
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def empty_rollup() -> Dict[str, Any]:
+        return {'total': 0, 'success': 0, 'expired': 0, 'gain': 0, 'latency': 0.0, 'latency_max': 0.0,
+                'methods': {}, 'errors': {}, 'accounts': {}}
+    
+    @staticmethod
+    def add(rollup: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        """把一条明细记录计入汇总"""
+        gain = record.get('gain') or 0
+        rollup['total'] += 1
+        rollup['success'] += bool(record['success'])
+        rollup['expired'] += bool(record.get('cookie_expired'))
+        rollup['gain'] += gain
+        rollup['latency'] = round(rollup['latency'] + (record.get('latency') or 0), 3)
+        rollup['latency_max'] = max(rollup['latency_max'], record.get('latency') or 0)
+        method = record['method'] if record['success'] else "failed"
+        rollup['methods'][method] = rollup['methods'].get(method, 0) + 1
+        if not record['success']:
+            rollup['errors'][record['error_class']] = rollup['errors'].get(record['error_class'], 0) + 1
+        # 账户维度: [次数, 成功, 鸡腿, 总耗时]
+        account = rollup['accounts'].setdefault(record['account'], [0, 0, 0, 0.0])
+        account[0] += 1
+        account[1] += bool(record['success'])
+        account[2] += gain
+        account[3] = round(account[3] + (record.get('latency') or 0), 3)
+        return rollup
+    
+    @classmethod
+    def merge(cls, target: Dict[str, Any], rollup: Dict[str, Any]) -> Dict[str, Any]:
+        """合并两个汇总"""
+        for key in ('total', 'success', 'expired', 'gain'):
+            target[key] += rollup[key]
+        target['latency'] = round(target['latency'] + rollup['latency'], 3)
+        target['latency_max'] = max(target['latency_max'], rollup['latency_max'])
+        for key in ('methods', 'errors'):
+            for name, count in rollup[key].items():
+                target[key][name] = target[key].get(name, 0) + count
+        for name, values in rollup['accounts'].items():
+            account = target['accounts'].setdefault(name, [0, 0, 0, 0.0])
+            for i, value in enumerate(values):
+                account[i] = round(account[i] + value, 3)
+        return target
+    
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """追加记录，必要时压缩过期明细"""
+        if not records:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+            cutoff = (datetime.now() - timedelta(days=self.raw_days)).strftime("%Y-%m-%d")
+            oldest = self._oldest_date()
+            if oldest and oldest < cutoff:
+                self._compact(cutoff)
+    
+    def _oldest_date(self) -> Optional[str]:
+        """明细按时间追加，首行即最早记录"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get('date')
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    def iter_records(self, since: str = "") -> Iterator[Dict[str, Any]]:
+        """逐行读取明细 (跳过损坏行)"""
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('date', "") >= since:
+                    yield record
+    
+    def load_rollups(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.rollup_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️  历史汇总读取失败，忽略: {str(e)}")
+            return {}
+    
+    def _compact(self, cutoff: str) -> None:
+        """把早于 cutoff 的明细压缩进每日汇总，其余明细原样保留"""
+        rollups = self.load_rollups()
+        kept = 0
+        # 先写出汇总再替换明细: 中途失败时最多重复计入，不会丢失记录
+        with atomic_write(self.path) as out:
+            for record in self.iter_records():
+                if record.get('date', "") < cutoff:
+                    self.add(rollups.setdefault(record['date'], self.empty_rollup()), record)
+                else:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    kept += 1
+            with atomic_write(self.rollup_path) as f:
+                json.dump(dict(sorted(rollups.items())), f, ensure_ascii=False)
+        logging.info(f"🗜️  签到历史已压缩: 汇总 {len(rollups)} 天，保留明细 {kept} 条")
+    
+    def daily(self, since: str, account: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """返回 since 之后每天的汇总 (合并已压缩的汇总与明细)"""
+        days: Dict[str, Dict[str, Any]] = {}
+        for day, rollup in self.load_rollups().items():
+            if day < since:
+                continue
+            if account is not None:
+                # 已压缩的日期只保留账户维度的次数、成功、鸡腿与耗时
+                values = rollup['accounts'].get(account)
+                if not values:
+                    continue
+                rollup = dict(self.empty_rollup(), total=values[0], success=values[1], gain=values[2],
+                              latency=values[3], accounts={account: values})
+            days[day] = rollup
+        for record in self.iter_records(since):
+            if account is None or record['account'] == account:
+                self.add(days.setdefault(record['date'], self.empty_rollup()), record)
+        return dict(sorted(days.items()))
+
+def history_report(history: RunHistory, days: int = 30, group: str = "day",
+                   account: Optional[str] = None) -> List[Dict[str, Any]]:
+    """按日 / 周 / 月聚合签到历史"""
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    periods: Dict[str, Dict[str, Any]] = {}
+    for day, rollup in history.daily(since, account).items():
+        date = datetime.strptime(day, "%Y-%m-%d")
+        if group == "week":
+            year, week, _ = date.isocalendar()
+            key = f"{year}-W{week:02d}"
+        elif group == "month":
+            key = day[:7]
+        else:
+            key = day
+        RunHistory.merge(periods.setdefault(key, RunHistory.empty_rollup()), rollup)
+    rows = []
+    for period, rollup in periods.items():
+        rows.append({
+            'period': period,
+            'total': rollup['total'],
+            'success': rollup['success'],
+            'success_rate': round(rollup['success'] / rollup['total'], 4) if rollup['total'] else 0.0,
+            'gain': rollup['gain'],
+            'avg_latency': round(rollup['latency'] / rollup['total'], 2) if rollup['total'] else 0.0,
+            'max_latency': rollup['latency_max'],
+            'expired': rollup['expired'],
+            'methods': rollup['methods'],
+            'errors': rollup['errors'],
+        })
+    return rows
+
+def print_history(rows: List[Dict[str, Any]]) -> None:
+    """输出签到趋势表格"""
+    if not rows:
+        print("暂无签到历史")
+        return
+    print(f"{'周期':<12} {'次数':>6} {'成功率':>8} {'鸡腿':>8} {'平均耗时':>9}  方法分布 / 失败原因")
+    for row in rows:
+        methods = " ".join(f"{name}:{count}" for name, count in sorted(row['methods'].items(), key=lambda item: -item[1]))
+        errors = " ".join(f"{name}:{count}" for name, count in sorted(row['errors'].items(), key=lambda item: -item[1]))
+        print(f"{row['period']:<12} {row['total']:>6} {row['success_rate'] * 100:>7.1f}% {row['gain']:>8} "
+              f"{row['avg_latency']:>8.2f}s  {methods}" + (f" | {errors}" if errors else ""))
+    total = sum(row['total'] for row in rows)
+    success = sum(row['success'] for row in rows)
+    print(f"{'合计':<12} {total:>6} {(success / total * 100 if total else 0):>7.1f}% "
+          f"{sum(row['gain'] for row in rows):>8}")
+
+def merge_cookie(cookie: str, name: str, value: str) -> str:
+    """在 Cookie 字符串中替换或追加指定项"""
+    items = [item.strip() for item in cookie.split(";") if item.strip()]
+    items = [item for item in items if item.split("=", 1)[0].strip() != name]
+    items.append(f"{name}={value}")
+    return "; ".join(items)
+
+class ClearanceCache:
+    """Cloudflare clearance 缓存 (按出口线路记录 cf_clearance 与对应 User-Agent)
+    
+    cf_clearance 与出口 IP、User-Agent 绑定，因此按线路 (直连 / 代理哈希，见 route_key) 分别保存，
+    HTTP 请求必须使用同一线路与同一 User-Agent。
+    """
+    
+    def __init__(self, path: Optional[str]):
+        self.path = path  # 为 None 时仅在内存中保存 (如 Selenium 工作进程)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if not path:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️  clearance 缓存读取失败，忽略: {str(e)}")
+    
+    def get(self, route: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """返回指定线路 (为 None 时任意线路中最新) 的有效 clearance"""
+        now = time.time()
+        with self._lock:
+            entries = [self._entries.get(route)] if route is not None else list(self._entries.values())
+            valid = [entry for entry in entries if entry and entry.get('expires_at', 0) > now]
+        return max(valid, key=lambda entry: entry['expires_at']) if valid else None
+    
+    def put(self, route: str, cf_clearance: str, user_agent: str, expires_at: float) -> Dict[str, Any]:
+        entry = {'route': route, 'cf_clearance': cf_clearance, 'user_agent': user_agent, 'expires_at': expires_at}
+        with self._lock:
+            self._entries[route] = entry
+            self._dirty = True
+        return entry
+    
+    def invalidate(self, route: str) -> None:
+        with self._lock:
+            if self._entries.pop(route, None) is not None:
+                self._dirty = True
+    
+    def save(self) -> None:
+        """原子写入缓存文件 (仅保留未过期条目)"""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            now = time.time()
+            entries = {route: entry for route, entry in self._entries.items() if entry.get('expires_at', 0) > now}
+            with atomic_write(self.path) as f:
+                json.dump(entries, f, ensure_ascii=False)
+            self._dirty = False
+
+class MethodRouter:
+    """自适应签到路由 (按账户 / 全局历史成功率与耗时为签到方法排序)
+    
+    依次尝试时，按 "预期耗时 / 成功概率" 升序排列可使期望总耗时最小；
+    账户级成功率持续过低的方法直接跳过，并以一定概率按默认顺序探索，
+    以便在低成本方法恢复时及时发现。
+    """
+    
+    DEFAULT_LATENCY = {'http': 3.0, 'proxy': 5.0, 'clearance': 8.0, 'selenium': 30.0}
+    ALPHA = 0.5            # 账户级 EWMA 权重 (近期结果影响更大)
+    SKIP_THRESHOLD = 0.05  # 账户级成功率低于此值时跳过
+    MIN_ATTEMPTS = 3       # 跳过前至少观察的次数
+    
+    def __init__(self, path: str, explore_rate: float = 0.1, enabled: bool = True):
+        self.path = path
+        self.explore_rate = explore_rate
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {'global': {}, 'accounts': {}}
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._stats.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️  路由统计读取失败，忽略: {str(e)}")
+            
+    def _global_rate(self, method: str) -> float:
+        entry = self._stats['global'].get(method, {})
+        return (entry.get('successes', 0) + 1) / (entry.get('attempts', 0) + 2)
+    
+    def _latency(self, account_stats: Dict, method: str) -> float:
+        for entry in (account_stats.get(method), self._stats['global'].get(method)):
+            if entry and entry.get('latency') is not None:
+                return max(entry['latency'], 0.01)
+        return self.DEFAULT_LATENCY.get(method, 10.0)
+    
+    def plan(self, cookie: str, methods: List[str]) -> List[str]:
+        """返回本次尝试的方法顺序"""
+        if not self.enabled or len(methods) <= 1 or random.random() < self.explore_rate:
+            return list(methods)
+        
+        with self._lock:
+            account_stats = self._stats['accounts'].get(cookie_fingerprint(cookie), {})
+            costs = {}
+            skipped = []
+            for method in methods:
+                entry = account_stats.get(method)
+                rate = entry['rate'] if entry else self._global_rate(method)
+                if entry and entry['attempts'] >= self.MIN_ATTEMPTS and rate < self.SKIP_THRESHOLD:
+                    skipped.append(method)
+                costs[method] = self._latency(account_stats, method) / max(rate, 0.01)
+        
+        ordered = sorted(methods, key=lambda m: costs[m])
+        kept = [m for m in ordered if m not in skipped]
+        return kept or ordered
+    
+    def record(self, cookie: str, method: str, success: bool, latency: float) -> None:
+        """记录一次尝试结果"""
+        outcome = 1.0 if success else 0.0
+        with self._lock:
+            global_entry = self._stats['global'].setdefault(method, {'attempts': 0, 'successes': 0, 'latency': None})
+            prior = self._global_rate(method)
+            global_entry['attempts'] += 1
+            global_entry['successes'] += int(success)
+            global_entry['latency'] = latency if global_entry['latency'] is None else \
+                0.8 * global_entry['latency'] + 0.2 * latency
+            
+            account_stats = self._stats['accounts'].setdefault(cookie_fingerprint(cookie), {})
+            entry = account_stats.setdefault(method, {'attempts': 0, 'rate': prior, 'latency': None})
+            entry['attempts'] += 1
+            entry['rate'] = (1 - self.ALPHA) * entry['rate'] + self.ALPHA * outcome
+            entry['latency'] = latency if entry['latency'] is None else \
+                (1 - self.ALPHA) * entry['latency'] + self.ALPHA * latency
+            self._dirty = True
+    
+    def save(self) -> None:
+        """原子写入路由统计"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(self._stats, f, ensure_ascii=False)
+            self._dirty = False
+
+class CircuitBreaker:
+    """运行级签到方法熔断器 (所有账户共享)
+    
+    某方法连续 threshold 次遭遇 Cloudflare 拦截后熔断，后续账户直接跳过该方法；
+    冷却期结束后进入半开状态，只放行一个账户探测，成功则恢复，
+    再次被拦截则重新计时。cooldown <= 0 表示本次运行内不再恢复。
+    任何非拦截的服务端响应 (成功、Cookie 过期、业务拒绝等) 都说明未被拦截，清零计数。
+    """
+    
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._state: Dict[str, Dict[str, Any]] = {}  # method -> {failures, opened_at, probing}
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "CircuitBreaker":
+        return cls(config.get('breaker_threshold', 3), config.get('breaker_cooldown', 300.0))
+    
+    def _entry(self, method: str) -> Dict[str, Any]:
+        return self._state.setdefault(method, {'failures': 0, 'opened_at': None, 'probing': False})
+    
+    def is_open(self, method: str) -> bool:
+        with self._lock:
+            return self._entry(method)['opened_at'] is not None
+    
+    def allow(self, method: str) -> bool:
+        """是否允许尝试该方法 (半开状态下仅放行一个探测)"""
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            entry = self._entry(method)
+            if entry['opened_at'] is None:
+                return True
+            if self.cooldown <= 0 or entry['probing'] or time.monotonic() - entry['opened_at'] < self.cooldown:
+                return False
+            entry['probing'] = True
+        logging.info(f"🔌 {method} 熔断冷却结束，放行一次探测")
+        METRICS.increment("breaker_probe", method=method)
+        return True
+    
+    def record(self, method: str, result: SigninResult) -> None:
+        """记录尝试结果: 只有结构性拦截计入连续失败，未被拦截的响应立即恢复"""
+        if self.threshold <= 0:
+            return
+        # 瞬时错误 (超时、连接失败) 不能说明是否被拦截，不影响计数
+        passed = result.error_class not in (ErrorClass.BLOCKED, ErrorClass.TRANSIENT)
+        with self._lock:
+            entry = self._entry(method)
+            was_open = entry['opened_at'] is not None
+            probing, entry['probing'] = entry['probing'], False
+            if passed:
+                entry['failures'] = 0
+                entry['opened_at'] = None
+            elif result.error_class == ErrorClass.BLOCKED:
+                entry['failures'] += 1
+                if probing or (not was_open and entry['failures'] >= self.threshold):
+                    entry['opened_at'] = time.monotonic()
+                else:
+                    return
+            else:
+                return
+        
+        if passed:
+            if was_open:
+                logging.info(f"🔌 {method} 探测未被拦截，熔断恢复")
+                METRICS.increment("breaker_close", method=method)
+        else:
+            window = f"{self.cooldown:g}s 内" if self.cooldown > 0 else "本次运行内"
+            logging.warning(f"🔌 {method} 连续 {entry['failures']} 次被 Cloudflare 拦截，熔断: {window}后续账户跳过该方法")
+            METRICS.increment("breaker_open", method=method)
+
+class RateLimitScheduler:
+    """按主机的令牌桶限速调度器 (带随机抖动)
+    
+    reserve() 立即返回本次请求的发送时刻 (令牌可透支，表示排队)，
+    调用方只需等待到该时刻；多个工作线程的等待相互重叠，
+    不再像固定 sleep 那样逐个累加。
+    """
+    
+    def __init__(self, rate: float = 1.0, burst: int = 2, jitter: float = 0.5):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = max(0.0, jitter)
+        self._buckets: Dict[str, List[float]] = {}  # key -> [令牌数, 上次补充时间]
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RateLimitScheduler":
+        return cls(config.get('rate_limit', 1.0), config.get('rate_burst', 2), config.get('rate_jitter', 0.5))
+    
+    def reserve(self, url: str, proxy_url: str = "") -> float:
+        """预约一个发送时隙，返回需要等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        key = f"{proxy_url}|{urlparse(url).netloc}"
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [float(self.burst), now])
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            bucket[0] -= 1
+            delay = -bucket[0] / self.rate if bucket[0] < 0 else 0.0
+        return delay + random.uniform(0, self.jitter)
+    
+    def wait(self, url: str, proxy_url: str = "") -> float:
+        """预约并等待到发送时隙"""
+        delay = self.reserve(url, proxy_url)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+def proxy_label(proxy: Optional[str]) -> str:
+    """日志中展示的代理 (仅 host:port，不含认证信息)"""
+    if not proxy:
+        return "直连"
+    parsed = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    return f"{parsed.hostname or '?'}:{port}" if port else (parsed.hostname or "?")
+
+def route_key(proxy: Optional[str]) -> str:
+    """出口线路标识 (直连为空，代理为哈希，避免把代理认证信息写入缓存文件)"""
+    return f"proxy-{hashlib.sha256(proxy.encode('utf-8')).hexdigest()[:16]}" if proxy else ""
+
+class ProxyPool:
+    """代理池 (后台健康检查 + 延迟排序 + 临时剔除 + 负载均衡)
+    
+    选择时取 "平滑延迟 × (在途请求数 + 1)" 最小的代理: 最快的代理承担更多请求，
+    但不会把所有账户压到同一个代理上。连续连接失败的代理临时剔除，
+    后台健康检查确认恢复后立即重新加入。
+    """
+    
+    FAILURE_THRESHOLD = 2   # 连续失败多少次后剔除
+    DEFAULT_LATENCY = 5.0   # 尚未测得延迟时的估计值 (秒)
+    
+    def __init__(self, proxies: Iterable[str], check_url: str = NODESEEK_BASE_URL, interval: float = 60.0,
+                 timeout: float = 10.0, evict_seconds: float = 300.0):
+        self.proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        self.check_url = check_url
+        self.interval = interval
+        self.timeout = timeout
+        self.evict_seconds = evict_seconds
+        self._state = {
+            proxy: {'latency': None, 'failures': 0, 'evicted_until': 0.0, 'in_flight': 0}
+            for proxy in self.proxies
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    @staticmethod
+    def parse(spec: str) -> List[str]:
+        """PROXY_URL 支持逗号、分号或空白分隔的多个代理"""
+        return [item for item in re.split(r"[\s,;]+", spec or "") if item]
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ProxyPool":
+        return cls(
+            cls.parse(config.get('proxy_url', "")),
+            check_url=config.get('proxy_check_url') or config.get('base_url', NODESEEK_BASE_URL),
+            # 录像回放时不做网络健康检查
+            interval=0 if config.get('cassette_mode') == "replay" else config.get('proxy_check_interval', 60.0),
+            timeout=min(config.get('timeout', 30), 10),
+            evict_seconds=config.get('proxy_evict_seconds', 300.0),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.proxies)
+    
+    def start(self) -> None:
+        """启动后台健康检查线程 (首轮检查立即执行)"""
+        if not self.proxies or self.interval <= 0 or self._thread:
+            return
+        
+        def loop():
+            while not self._stop.is_set():
+                self.check_all()
+                self._stop.wait(self.interval)
+        
+        self._thread = threading.Thread(target=loop, name="proxy-health", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+    
+    def check(self, proxy: str) -> bool:
+        """健康检查: 能经代理拿到任意 HTTP 响应即视为可用，并记录延迟"""
+        started = time.monotonic()
+        try:
+            response = get_http_backend().request(
+                "GET", self.check_url, proxies={'http': proxy, 'https': proxy},
+                timeout=self.timeout, allow_redirects=False
+            )
+            response.close()
+        except Exception as e:
+            logging.debug(f"代理健康检查失败 {proxy_label(proxy)}: {str(e)}")
+            self.report(proxy, False, immediate=True)
+            return False
+        self.report(proxy, True, time.monotonic() - started)
+        return True
+    
+    def check_all(self) -> None:
+        with ThreadPoolExecutor(max_workers=min(8, len(self.proxies)), thread_name_prefix="proxy-check") as executor:
+            list(executor.map(self.check, self.proxies))
+    
+    def report(self, proxy: str, success: bool, latency: Optional[float] = None, immediate: bool = False) -> None:
+        """记录一次经该代理的请求结果 (连接级成功 / 失败)，immediate 表示健康检查失败直接剔除"""
+        with self._lock:
+            entry = self._state.get(proxy)
+            if entry is None:  # 账户级代理不在池中
+                return
+            now = time.monotonic()
+            evicted = entry['evicted_until'] > now
+            if success:
+                entry['failures'] = 0
+                entry['evicted_until'] = 0.0
+                if latency is not None:
+                    entry['latency'] = latency if entry['latency'] is None else 0.7 * entry['latency'] + 0.3 * latency
+            else:
+                entry['failures'] += 1
+                if evicted or (entry['failures'] < self.FAILURE_THRESHOLD and not immediate):
+                    return
+                entry['evicted_until'] = now + self.evict_seconds
+        
+        if success and evicted:
+            logging.info(f"🌐 代理恢复可用: {proxy_label(proxy)}")
+        elif not success:
+            logging.warning(f"🌐 代理连接失败，剔除 {self.evict_seconds:g}s: {proxy_label(proxy)}")
+            METRICS.increment("proxy_evicted")
+    
+    def is_evicted(self, proxy: Optional[str]) -> bool:
+        with self._lock:
+            entry = self._state.get(proxy)
+            return bool(entry) and entry['evicted_until'] > time.monotonic()
+    
+    def _select_locked(self) -> Optional[str]:
+        now = time.monotonic()
+        candidates = [proxy for proxy in self.proxies if self._state[proxy]['evicted_until'] <= now]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda proxy: (self._state[proxy]['latency'] or self.DEFAULT_LATENCY)
+                   * (self._state[proxy]['in_flight'] + 1))
+    
+    def resolve(self, route: str) -> Optional[str]:
+        """由线路标识找回代理地址 (不在池中时返回 None)"""
+        return next((proxy for proxy in self.proxies if route_key(proxy) == route), None)
+    
+    def select(self) -> Optional[str]:
+        """选择当前最优的可用代理，全部被剔除时返回 None"""
+        with self._lock:
+            return self._select_locked()
+    
+    @contextmanager
+    def lease(self):
+        """借用一个代理 (计入在途请求数，用于负载均衡)"""
+        with self._lock:
+            proxy = self._select_locked()
+            if proxy:
+                self._state[proxy]['in_flight'] += 1
+        try:
+            yield proxy
+        finally:
+            if proxy:
+                with self._lock:
+                    self._state[proxy]['in_flight'] -= 1
+
+class RetryBudget:
+    """运行级重试预算: 重试次数不超过 minimum + ratio × 首次尝试次数
+    
+    站点整体故障时避免所有账户同时重试放大流量。
+    """
+    
+    def __init__(self, ratio: float = 0.2, minimum: int = 10):
+        self.ratio = max(0.0, ratio)
+        self.minimum = max(0, minimum)
+        self.attempts = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        
+    def record_attempt(self) -> None:
+        with self._lock:
+            self.attempts += 1
+    
+    def try_spend(self) -> bool:
+        """申请一次重试额度"""
+        with self._lock:
+            if self.retries >= self.minimum + self.ratio * self.attempts:
+                return False
+            self.retries += 1
+            return True
+
+class RetryPolicy:
+    """按错误分类的重试策略 (指数退避 + 全抖动，受运行级预算约束)
+    
+    - 可重试的分类在同一方法上重试 (仅限 HTTP / 代理等低成本方法)
+    - 只有可升级的分类 (默认 Cloudflare 拦截与未分类错误) 才会切换到下一个方法
+    """
+    
+    CHEAP_METHODS = ("http", "proxy", "clearance")
+    
+    def __init__(self, retries: Dict[ErrorClass, int], escalate: Iterable[ErrorClass],
+                 backoff: float = 1.0, max_backoff: float = 10.0, budget: Optional[RetryBudget] = None):
+        self.retries = retries
+        self.escalate = set(escalate)
+        self.backoff = max(0.0, backoff)
+        self.max_backoff = max(self.backoff, max_backoff)
+        self.budget = budget or RetryBudget()
+        
+    @staticmethod
+    def _parse_classes(spec: str) -> Dict[ErrorClass, int]:
+        """解析 "transient=2,blocked=0" 形式的配置，忽略无法识别的项"""
+        parsed = {}
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            name, _, value = item.partition("=")
+            try:
+                parsed[ErrorClass(name.strip().lower())] = int(value) if value.strip() else 0
+            except ValueError:
+                logging.warning(f"⚠️  无法识别的重试策略配置，已忽略: {item.strip()}")
+        return parsed
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        return cls(
+            retries={k: max(0, v) for k, v in cls._parse_classes(config.get('retry_policy', "transient=2")).items()},
+            escalate=cls._parse_classes(config.get('retry_escalate', "blocked,unknown")),
+            backoff=config.get('retry_backoff', 1.0),
+            max_backoff=config.get('retry_max_backoff', 10.0),
+            budget=RetryBudget(config.get('retry_budget', 0.2)),
+        )
+    
+    def should_retry(self, method: str, result: SigninResult, attempt: int) -> bool:
+        """attempt 为已完成的重试次数"""
+        if result.success or method not in self.CHEAP_METHODS:
+            return False
+        if attempt >= self.retries.get(result.error_class, 0):
+            return False
+        if not self.budget.try_spend():
+            METRICS.increment("retry_budget_exhausted", method=method, error_class=result.error_class.value)
+            return False
+        return True
+    
+    def should_escalate(self, result: SigninResult) -> bool:
+        return not result.success and result.error_class in self.escalate
+    
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间 (全抖动)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
 class StatisticsTracker:
     """签到统计追踪器"""
     
-    def __init__(self, cookie: str):
+    MAX_PAGES = 10  # 首次查询最多10页 (GitHub Actions 资源限制)
+    
+    def __init__(self, cookie: str, session_pool: Optional[HTTPSessionPool] = None,
+                 ledger: Optional[CreditLedgerCache] = None, base_url: str = NODESEEK_BASE_URL):
         self.cookie = cookie
+        self.base_url = base_url
+        self.session_pool = session_pool or get_shared_session_pool()
+        self.ledger = ledger or CreditLedgerCache()
+        
+    def sync_ledger(self, since: datetime) -> int:
+        """增量同步账本: 超出统计窗口即停止翻页，返回请求页数
+        
+        只有同步水位已覆盖统计窗口时，遇到已缓存的记录才提前停止；否则 (如上次同步中途失败，
+        缓存中间有缺口) 继续翻页越过缺口。同步开始时清除水位，正常结束后再写入。
+        """
+        account = cookie_fingerprint(self.cookie)
+        watermark = self.ledger.sync_watermark(account)
+        covered = watermark is not None and watermark <= since
+        self.ledger.set_sync_watermark(account, None)
+        oldest: Optional[datetime] = None
+        headers = {
+            'User-Agent': self.session_pool.profiles.user_agent,
+            'Cookie': self.cookie
+        }
+        
+        page = 1
+        while page <= self.MAX_PAGES:
+            url = f"{self.base_url}/api/account/credit/page-{page}"
+            
+            response = self.session_pool.request(
+                "GET", url, account_key=account,
+                headers=headers, timeout=10
+            )
+            
+            data = response.json()
+            records = (data.get("data") or []) if data.get("success") else []
+            if not records:
+                # 账本已翻到底，窗口内的记录全部在本地
+                oldest = since if oldest is None else min(oldest, since)
+                break
+            
+            inserted, valid = self.ledger.add_records(account, records)
+            times = [t for t in (parse_ledger_time(r[3]) for r in records if len(r) >= 4) if t]
+            if times:
+                oldest = min(times) if oldest is None else min(oldest, min(times))
+            
+            # 本页存在已缓存记录且水位覆盖统计窗口，说明更早的数据已连续在本地
+            if covered and inserted < valid:
+                oldest = watermark
+                break
+            
+            # 本页最早的记录已超出统计窗口
+            if times and min(times) < since:
+                break
+                
+            page += 1
+        if oldest is not None:
+            self.ledger.set_sync_watermark(account, oldest)
+        return page
         
     def get_signin_stats(self, days: int = 30) -> Tuple[Optional[Dict], str]:
-        """获取签到统计 (来自 nodeseek_sign.py)"""
+        """获取签到统计 (本地账本 + 增量同步)"""
         if not self.cookie:
             return None, "无有效Cookie"
         
         try:
-            headers = {
-                'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-                'Cookie': self.cookie
-            }
-            
-            all_records = []
-            page = 1
-            
-            # 最多查询10页 (GitHub Actions 资源限制)
-            while page <= 10:
-                url = f"https://www.nodeseek.com/api/account/credit/page-{page}"
-                
-                if USE_CURL_CFFI:
-                    try:
-                        response = cf_requests.get(url, headers=headers, timeout=10, impersonate="chrome120")
-                    except:
-                        response = cf_requests.get(url, headers=headers, timeout=10)
-                else:
-                    response = cf_requests.get(url, headers=headers, timeout=10)
-                
-                data = response.json()
-                if not data.get("success") or not data.get("data"):
-                    break
-                    
-                records = data.get("data", [])
-                if not records:
-                    break
-                    
-                all_records.extend(records)
-                page += 1
-                time.sleep(0.3)  # 降低请求频率
-            
-            # 简化统计逻辑
-            signin_records = []
-            for record in all_records:
-                if len(record) >= 4 and "签到收益" in str(record[2]):
-                    signin_records.append({
-                        'amount': record[0],
-                        'description': record[2]
-                    })
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            with METRICS.span("stats_sync"):
+                pages = self.sync_ledger(since)
+            METRICS.increment("stats_pages", pages)
             
-            if not signin_records:
+            amounts = self.ledger.signin_amounts(cookie_fingerprint(self.cookie), since)
+            if not amounts:
                 return None, "未找到签到记录"
             
-            total_amount = sum(r['amount'] for r in signin_records[:days])
-            count = min(len(signin_records), days)
+            total_amount = sum(amounts)
+            count = len(amounts)
             average = round(total_amount / count, 2) if count > 0 else 0
             
             stats = {
@@ -230,28 +2084,15 @@ class StatisticsTracker:
 class HTTPSigner:
     """HTTP 签到器 (轻量级方案)"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], session_pool: Optional[HTTPSessionPool] = None,
+                 proxy_pool: Optional[ProxyPool] = None):
         self.config = config
-        self.session = None
-        
-    def create_session(self, use_proxy: bool = False):
-        """创建 HTTP 会话"""
-        if USE_CURL_CFFI:
-            self.session = cf_requests.Session()
-        else:
-            self.session = cf_requests.Session()
-            
-        if use_proxy and self.config['proxy_url']:
-            proxies = {
-                'http': self.config['proxy_url'],
-                'https': self.config['proxy_url']
-            }
-            if hasattr(self.session, 'proxies'):
-                self.session.proxies.update(proxies)
+        self.session_pool = session_pool or HTTPSessionPool(config)
+        self.proxy_pool = proxy_pool if proxy_pool is not None else ProxyPool.from_config(config)
                 
-    def get_headers(self, cookie: str) -> Dict[str, str]:
+    def get_headers(self, cookie: str, user_agent: str = "") -> Dict[str, str]:
         """获取请求头"""
-        return {
+        headers = {
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate, br',
@@ -259,41 +2100,67 @@ class HTTPSigner:
             'Connection': 'keep-alive',
             'Content-Type': 'application/json',
             'Cookie': cookie,
-            'Host': 'www.nodeseek.com',
-            'Origin': 'https://www.nodeseek.com',
-            'Referer': 'https://www.nodeseek.com/board',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
+            'Host': urlparse(self.config['base_url']).netloc,
+            'Origin': self.config['base_url'],
+            'Referer': f"{self.config['base_url']}/board",
+            'User-Agent': self.session_pool.profiles.user_agent,
             'X-Requested-With': 'XMLHttpRequest'
         }
+        if user_agent:
+            headers['User-Agent'] = user_agent
+        return headers
+    
+    def signin(self, cookie: str, use_proxy: bool = False, proxy_url: str = "",
+               random_mode: Optional[bool] = None) -> SigninResult:
+        """HTTP 签到 (proxy_url / random_mode 为账户级覆盖，未指定代理时从代理池选择)"""
+        if not use_proxy or proxy_url:
+            return self._signin(cookie, use_proxy, proxy_url, random_mode)
+        with self.proxy_pool.lease() as pooled:
+            if not pooled:
+                return SigninResult(False, "没有可用的代理 (均已剔除)", "proxy")
+            return self._signin(cookie, use_proxy, pooled, random_mode)
+    
+    def signin_with_clearance(self, cookie: str, clearance: Dict[str, Any],
+                              random_mode: Optional[bool] = None) -> SigninResult:
+        """使用浏览器获得的 cf_clearance 签到 (必须沿用同一出口线路与 User-Agent)"""
+        proxy_url = self.proxy_pool.resolve(clearance['route']) if clearance['route'] else ""
+        if proxy_url is None:
+            return SigninResult(False, "clearance 对应的代理已不在代理池中", "clearance",
+                                error_class=ErrorClass.BLOCKED)
+        cookie = merge_cookie(cookie, "cf_clearance", clearance['cf_clearance'])
+        result = self._signin(cookie, bool(proxy_url), proxy_url, random_mode,
+                              user_agent=clearance['user_agent'])
+        result.method = "clearance"
+        return result
     
-    def signin(self, cookie: str, use_proxy: bool = False) -> SigninResult:
-        """HTTP 签到"""
+    def _signin(self, cookie: str, use_proxy: bool, proxy_url: str, random_mode: Optional[bool],
+                user_agent: str = "") -> SigninResult:
         try:
-            self.create_session(use_proxy)
-            headers = self.get_headers(cookie)
-            
-            # 随机延迟
-            delay = random.uniform(1, 3)
-            time.sleep(delay)
+            if random_mode is None:
+                random_mode = self.config['random_mode']
+            headers = self.get_headers(cookie, user_agent)
             
             # 构造签到请求
-            random_param = "true" if self.config['random_mode'] else "false"
-            url = f"https://www.nodeseek.com/api/attendance?random={random_param}"
+            random_param = "true" if random_mode else "false"
+            url = f"{self.config['base_url']}/api/attendance?random={random_param}"
             
             # 发送请求
-            if USE_CURL_CFFI:
-                try:
-                    response = self.session.post(
-                        url, headers=headers, json={}, 
-                        timeout=self.config['timeout'],
-                        impersonate="chrome120"
-                    )
-                except:
-                    response = self.session.post(url, headers=headers, json={}, timeout=self.config['timeout'])
-            else:
-                response = self.session.post(url, headers=headers, json={}, timeout=self.config['timeout'])
+            started = time.monotonic()
+            try:
+                response = self.session_pool.request(
+                    "POST", url, account_key=cookie_fingerprint(cookie), proxy_url=proxy_url,
+                    headers=headers, json={}, timeout=self.config['timeout']
+                )
+            except Exception as e:
+                # 被取消的请求 (对冲输掉的一方) 不代表代理故障
+                if proxy_url and not isinstance(e, RequestCancelled) and classify_exception(e) == ErrorClass.TRANSIENT:
+                    self.proxy_pool.report(proxy_url, False)
+                raise
+            if proxy_url:
+                self.proxy_pool.report(proxy_url, True, time.monotonic() - started)
             
             # 解析响应
+            method = "proxy" if use_proxy else "http"
             if response.status_code == 200:
                 try:
                     result = response.json()
@@ -301,59 +2168,199 @@ class HTTPSigner:
                         gain = result.get('gain', 0)
                         current = result.get('current', 0)
                         message = f"签到成功！今天获得 {gain} 个鸡腿，总计 {current} 个鸡腿"
-                        method = "proxy" if use_proxy else "http"
-                        return SigninResult(True, message, method)
-                    else:
-                        return SigninResult(False, result.get('message', '签到失败'), "http")
+                        return SigninResult(True, message, method, gain=gain, current=current)
+                    message = result.get('message', '签到失败')
+                    if any(keyword in message for keyword in ['已完成签到', '已签到', '重复操作']):
+                        return SigninResult(True, f"今日已签到: {message}", method)
+                    return SigninResult(False, message, method, error_class=ErrorClass.REJECTED)
                 except json.JSONDecodeError:
-                    return SigninResult(False, f"响应解析失败: {response.text[:100]}", "http")
+                    # 200 但不是 JSON: 通常是 Cloudflare 质询页
+                    error_class = ErrorClass.BLOCKED if self.is_challenge(response.text) else ErrorClass.UNKNOWN
+                    return SigninResult(False, f"响应解析失败: {response.text[:100]}", method,
+                                        error_class=error_class)
             
             elif response.status_code == 500:
                 try:
                     result = response.json()
                     message = result.get('message', '')
                     if any(keyword in message for keyword in ['已完成签到', '已签到', '重复操作']):
-                        return SigninResult(True, f"今日已签到: {message}", "http")
+                        return SigninResult(True, f"今日已签到: {message}", method)
                     else:
-                        return SigninResult(False, f"服务器错误: {message}", "http")
+                        return SigninResult(False, f"服务器错误: {message}", method,
+                                            error_class=ErrorClass.TRANSIENT)
                 except:
-                    return SigninResult(False, f"服务器 500 错误", "http")
+                    return SigninResult(False, f"服务器 500 错误", method, error_class=ErrorClass.TRANSIENT)
             
             elif response.status_code == 401:
                 # Cookie过期或无效
-                return SigninResult(False, "Cookie已过期，请手动更新", "http", cookie_expired=True)
+                return SigninResult(False, "Cookie已过期，请手动更新", method, cookie_expired=True)
             
             elif response.status_code == 403:
-                return SigninResult(False, "403 Forbidden - 可能被 Cloudflare 拦截", "http")
+                return SigninResult(False, "403 Forbidden - 可能被 Cloudflare 拦截", method,
+                                    error_class=ErrorClass.BLOCKED)
                 
             elif response.status_code == 302:
                 # 重定向通常意味着未登录
-                return SigninResult(False, "302重定向 - Cookie可能已过期", "http", cookie_expired=True)
+                return SigninResult(False, "302重定向 - Cookie可能已过期", method, cookie_expired=True)
+            
+            elif response.status_code == 429 or response.status_code >= 500:
+                return SigninResult(False, f"HTTP {response.status_code} 错误", method,
+                                    error_class=ErrorClass.TRANSIENT)
             
             else:
                 # 检查响应文本是否包含登录页面特征
                 response_text = response.text.lower()
                 if any(keyword in response_text for keyword in ['login', 'signin', 'sign in', '登录', '请登录']):
-                    return SigninResult(False, f"HTTP {response.status_code} - Cookie可能已过期", "http", cookie_expired=True)
+                    return SigninResult(False, f"HTTP {response.status_code} - Cookie可能已过期", method, cookie_expired=True)
                 else:
-                    return SigninResult(False, f"HTTP {response.status_code} 错误", "http")
+                    return SigninResult(False, f"HTTP {response.status_code} 错误", method)
                 
         except Exception as e:
-            return SigninResult(False, f"HTTP 签到异常: {str(e)}", "http")
+            return SigninResult(False, f"HTTP 签到异常: {str(e)}", "proxy" if use_proxy else "http",
+                                error_class=classify_exception(e))
+    
+    @staticmethod
+    def is_challenge(text: str) -> bool:
+        """是否为 Cloudflare 质询页"""
+        text = text[:4096].lower()
+        return "just a moment" in text or "cf-chl" in text or "challenge-platform" in text
+
+class BrowserPool:
+    """浏览器实例池 (跨账户复用已预热的 Chrome)
+    
+    归还时通过 CDP 清空 Cookie 与站点存储，保证下个账户拿到干净状态；
+    实例达到最大使用次数或健康检查失败时回收重建。
+    """
+    
+    def __init__(self, factory, max_size: int = 1, max_uses: int = 20, origin: str = NODESEEK_BASE_URL,
+                 retire=None):
+        self.factory = factory
+        self.origin = origin
+        self.retire = retire  # 可选: retire(driver) 为真时回收实例 (如代理已被剔除)
+        self.max_size = max(1, max_size)
+        self.max_uses = max(1, max_uses)
+        self._idle: List[List[Any]] = []  # [driver, 使用次数]
+        self._lock = threading.Lock()
+        self.launches = 0
+        
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """健康检查: 浏览器进程与会话仍可响应"""
+        try:
+            return driver.execute_script("return 1") == 1 and bool(driver.window_handles)
+        except Exception:
+            return False
+    
+    def reset(self, driver) -> None:
+        """清理账户状态 (Cookie / localStorage 等)，保留 HTTP 缓存以加速首屏"""
+        try:
+            driver.execute_cdp_cmd("Storage.clearCookies", {})
+        except Exception:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+            "origin": self.origin,
+            "storageTypes": "local_storage,session_storage,indexeddb,websql,service_workers",
+        })
+        driver.get("about:blank")
+    
+    @staticmethod
+    def _quit(driver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def _acquire(self) -> List[Any]:
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                self.launches += 1
+                logging.info(f"🌐 启动浏览器实例 (本次运行第 {self.launches} 次)")
+                with METRICS.span("selenium_launch"):
+                    return [self.factory(), 0]
+            if self.retire and self.retire(entry[0]):
+                logging.info("🌐 浏览器实例的代理已不可用，重新创建")
+            elif self.is_healthy(entry[0]):
+                return entry
+            else:
+                logging.warning("⚠️  浏览器实例健康检查失败，重新创建")
+            self._quit(entry[0])
+    
+    def _release(self, entry: List[Any]) -> None:
+        driver = entry[0]
+        entry[1] += 1
+        if entry[1] >= self.max_uses or not self.is_healthy(driver):
+            self._quit(driver)
+            return
+        try:
+            self.reset(driver)
+        except Exception as e:
+            logging.warning(f"⚠️  浏览器状态清理失败，回收实例: {str(e)}")
+            self._quit(driver)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(entry)
+                return
+        self._quit(driver)
+    
+    @contextmanager
+    def lease(self):
+        """借出一个干净的浏览器实例"""
+        entry = self._acquire()
+        try:
+            yield entry[0]
+        finally:
+            self._release(entry)
+    
+    def close(self) -> None:
+        """关闭所有空闲浏览器"""
+        with self._lock:
+            entries, self._idle = self._idle, []
+        for driver, _ in entries:
+            self._quit(driver)
+
+def select_browser_proxy(proxy_pool: Optional[ProxyPool]) -> Optional[str]:
+    """为新浏览器选择代理 (Chrome 启动参数不支持代理认证，带账号密码的代理跳过)"""
+    if not proxy_pool:
+        return None
+    proxy = proxy_pool.select()
+    if proxy and urlparse(proxy).username:
+        logging.warning("⚠️  Chrome 不支持带认证信息的代理参数，浏览器改为直连")
+        return None
+    return proxy
 
 class SeleniumSigner:
     """Selenium 签到器 (终极方案)"""
     
-    def __init__(self, config: Dict[str, Any]):
+    # 轻量模式下屏蔽的资源 (不含 Cloudflare 质询相关域名，避免影响验证)
+    BLOCKED_URLS = [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*clarity.ms*", "*hm.baidu.com*", "*static.cloudflareinsights.com*",
+    ]
+    
+    def __init__(self, config: Dict[str, Any], limiter: Optional[ConcurrencyLimiter] = None,
+                 proxy_pool: Optional[ProxyPool] = None, clearance_cache: Optional[ClearanceCache] = None):
         self.config = config
-        self.driver = None
+        self.clearance_cache = clearance_cache
+        self.limiter = limiter or ConcurrencyLimiter(selenium_limit=config['selenium_concurrency'])
+        self.proxy_pool = proxy_pool if config.get('selenium_proxy', True) else None
+        self.browser_pool = BrowserPool(
+            self.create_driver, config['selenium_concurrency'], config['browser_max_uses'], config['base_url'],
+            retire=lambda driver: bool(self.proxy_pool) and self.proxy_pool.is_evicted(getattr(driver, "nodeseek_proxy", None))
+        )
+        # Cookie 作用域: www.nodeseek.com → .nodeseek.com
+        hostname = urlparse(config['base_url']).hostname or ""
+        self.cookie_domain = f".{hostname[4:]}" if hostname.startswith("www.") else hostname
         
     def create_driver(self):
         """创建 WebDriver"""
-        if not SELENIUM_AVAILABLE:
-            raise ImportError("Selenium 不可用")
+        sel = load_selenium()
             
-        chrome_options = Options()
+        chrome_options = sel.Options()
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
@@ -362,122 +2369,667 @@ class SeleniumSigner:
         
         if self.config['headless']:
             chrome_options.add_argument("--headless=new")
+        
+        if self.config['selenium_lite']:
+            # DOMContentLoaded 即返回，不等待图片等子资源
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--mute-audio")
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-background-networking")
             
         chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+            f"--user-agent={DEFAULT_USER_AGENT}"
         )
         
+        proxy = self.select_proxy()
+        if proxy:
+            chrome_options.add_argument(f"--proxy-server={proxy}")
+            logging.info(f"🌐 浏览器使用代理: {proxy_label(proxy)}")
+        
+        try:
+            driver = sel.uc.Chrome(options=chrome_options)
+        except:
+            # GitHub Actions fallback
+            driver = sel.webdriver.Chrome(options=chrome_options)
+        driver.nodeseek_proxy = proxy
+            
+        # 隐藏自动化特征
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": """
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
+            """
+        })
+        
+        if self.config['selenium_lite']:
+            extra = [item.strip() for item in self.config['selenium_block'].split(",") if item.strip()]
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.BLOCKED_URLS + extra})
+        return driver
+        
+    def select_proxy(self) -> Optional[str]:
+        return select_browser_proxy(self.proxy_pool)
+    
+    def signin(self, cookie: str, random_mode: Optional[bool] = None) -> SigninResult:
+        """Selenium 签到 (受 Selenium 并发上限约束)"""
+        if random_mode is None:
+            random_mode = self.config['random_mode']
+        with self.limiter.selenium():
+            return self._signin(cookie, random_mode)
+    
+    def close(self) -> None:
+        """关闭浏览器池"""
+        self.browser_pool.close()
+    
+    def warm_up(self) -> None:
+        """预启动一个浏览器 (归还浏览器池后保持空闲)"""
+        with self.browser_pool.lease():
+            pass
+    
+    def harvest_clearance(self, driver) -> Optional[Dict[str, Any]]:
+        """从浏览器中提取 cf_clearance 与 User-Agent 写入 clearance 缓存"""
+        if self.clearance_cache is None:
+            return None
+        try:
+            cookie = driver.get_cookie("cf_clearance")
+            if not cookie:
+                return None
+            user_agent = driver.execute_script("return navigator.userAgent")
+        except Exception as e:
+            logging.debug(f"提取 clearance 失败: {str(e)}")
+            return None
+        expires_at = time.time() + self.config['clearance_ttl']
+        if cookie.get("expiry"):
+            expires_at = min(expires_at, float(cookie["expiry"]))
+        route = route_key(getattr(driver, "nodeseek_proxy", None))
+        return self.clearance_cache.put(route, cookie["value"], user_agent, expires_at)
+    
+    def solve_clearance(self) -> Optional[Dict[str, Any]]:
+        """用一个浏览器通过 Cloudflare 质询，返回获得的 clearance"""
+        sel = load_selenium()
+        with self.limiter.selenium(), self.browser_pool.lease() as driver, METRICS.span("selenium_clearance"):
+            driver.get(self.config['base_url'])
+            try:
+                sel.WebDriverWait(driver, self.config['timeout']).until(lambda d: d.get_cookie("cf_clearance"))
+            except Exception:
+                return None
+            return self.harvest_clearance(driver)
+    
+    def _signin(self, cookie: str, random_mode: bool) -> SigninResult:
+        try:
+            with self.browser_pool.lease() as driver:
+                try:
+                    return self._signin_with_driver(driver, cookie, random_mode)
+                except Exception as e:
+                    proxy = getattr(driver, "nodeseek_proxy", None)
+                    if proxy and self.proxy_pool and any(key in str(e) for key in ("ERR_PROXY", "ERR_TUNNEL")):
+                        self.proxy_pool.report(proxy, False)
+                    raise
+        except Exception as e:
+            error_msg = str(e)
+            # 检查是否是登录相关错误
+            if any(keyword in error_msg.lower() for keyword in ['login', 'signin', 'authentication', '登录']):
+                return SigninResult(False, f"Selenium - Cookie可能已过期: {error_msg}", "selenium", cookie_expired=True)
+            else:
+                return SigninResult(False, f"Selenium 签到异常: {error_msg}", "selenium")
+    
+    def inject_cookies(self, driver, cookie: str) -> None:
+        """写入账户 Cookie: 轻量模式通过 CDP 在首次导航前写入，否则需先打开站点再 add_cookie"""
+        sel = load_selenium()
+        secure = self.config['base_url'].startswith("https://")
+        if not self.config['selenium_lite']:
+            with METRICS.span("selenium_page_load", page="home"):
+                driver.get(self.config['base_url'])
+                sel.WebDriverWait(driver, 30).until(
+                    sel.EC.presence_of_element_located((sel.By.TAG_NAME, "body"))
+                )
+        
+        for item in cookie.split(";"):
+            try:
+                name, value = item.strip().split("=", 1)
+                if self.config['selenium_lite']:
+                    driver.execute_cdp_cmd("Network.setCookie", {
+                        "name": name,
+                        "value": value,
+                        "domain": self.cookie_domain,
+                        "path": "/",
+                        "secure": secure,
+                    })
+                else:
+                    driver.add_cookie({
+                        "name": name,
+                        "value": value,
+                        "domain": self.cookie_domain,
+                        "path": "/",
+                    })
+            except:
+                continue
+    
+    def _signin_with_driver(self, driver, cookie: str, random_mode: bool) -> SigninResult:
+        """使用已借出的浏览器执行签到"""
+        sel = load_selenium()
+        self.inject_cookies(driver, cookie)
+
+        # 直接打开签到页，等待登录用户名或被重定向到登录页 (替代固定等待)
+        with METRICS.span("selenium_page_load", page="board"):
+            driver.get(f"{self.config['base_url']}/board")
+        try:
+            with METRICS.span("selenium_wait", target="username"):
+                sel.WebDriverWait(driver, 30).until(
+                    lambda d: d.find_elements(sel.By.CSS_SELECTOR, "a.Username")
+                    or any(key in d.current_url.lower() for key in ("signin", "login"))
+                )
+        except Exception:
+            pass
+
+        # 验证登录状态
+        usernames = driver.find_elements(sel.By.CSS_SELECTOR, "a.Username")
+        if not usernames:
+            # 检查是否被重定向到登录页面
+            current_url = driver.current_url
+            if "signin" in current_url.lower() or "login" in current_url.lower():
+                return SigninResult(False, "Selenium - Cookie已过期，需要重新登录", "selenium", cookie_expired=True)
+            else:
+                return SigninResult(False, "Selenium 登录验证失败", "selenium")
+        logging.info(f"🔐 Selenium 登录成功: {usernames[0].text.strip()}")
+        self.harvest_clearance(driver)
+
+        with METRICS.span("selenium_wait", target="head_info"):
+            sel.WebDriverWait(driver, 30).until(
+                sel.EC.presence_of_element_located((sel.By.CSS_SELECTOR, ".head-info > div"))
+            )
+
+        # 检查签到状态
+        head_info = driver.find_element(sel.By.CSS_SELECTOR, ".head-info > div")
+        buttons = head_info.find_elements(sel.By.TAG_NAME, "button")
+
+        if not buttons:
+            # 已签到
+            info_text = head_info.text.strip()
+            return SigninResult(True, f"今日已签到: {info_text}", "selenium")
+
+        # 执行签到
+        mode = "试试手气" if random_mode else "鸡腿 x 5"
+        button_xpath = (f"//div[button[text()='鸡腿 x 5'] and button[text()='试试手气']]"
+                        f"/button[text()='{mode}']")
+
+        with METRICS.span("selenium_click"):
+            button = sel.WebDriverWait(driver, 15).until(
+                sel.EC.element_to_be_clickable((sel.By.XPATH, button_xpath))
+            )
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
+            button.click()
+            # 等待签到按钮消失 (签到完成)，超时不影响结果判定
+            try:
+                sel.WebDriverWait(driver, 5).until(
+                    lambda d: not d.find_elements(sel.By.XPATH, button_xpath)
+                )
+            except Exception:
+                logging.debug("签到按钮未在预期时间内消失")
+
+        return SigninResult(True, f"Selenium 签到成功 ({mode})", "selenium")
+
+def read_meminfo_mb(field: str = "MemAvailable") -> Optional[float]:
+    """读取 /proc/meminfo 中的字段 (MB)，非 Linux 系统返回 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def process_tree(pid: int) -> List[int]:
+    """返回进程及其全部子孙进程的 PID (遍历 /proc/*/stat 的父进程字段)"""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return [pid]
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 进程名可能包含空格与括号，从最后一个 ")" 之后解析: 状态 父进程 ...
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+def tree_rss_mb(pid: int) -> float:
+    """进程树常驻内存总量 (MB)，读取 /proc/<pid>/status 的 VmRSS"""
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except (OSError, ValueError, IndexError):
+            continue
+    return total / 1024
+
+def selenium_worker_main(config: Dict[str, Any], proxy: Optional[str], conn) -> None:
+    """Selenium 工作进程入口: 在独立进程组中运行浏览器，逐个执行父进程下发的任务
+    
+    任务: ("signin", (cookie, random_mode)) / ("clearance", ()) / ("warm", ())，
+    回复 {'result': ..., 'clearance': ..., 'error': ...}；收到 None 或管道关闭时退出。
+    """
+    if hasattr(os, "setsid"):
+        try:
+            # 成为进程组组长，Chrome 及其子进程继承该进程组，父进程可整组终止
+            os.setsid()
+        except OSError:
+            pass
+    signer = SeleniumSigner(
+        config, proxy_pool=ProxyPool([proxy], interval=0) if proxy else None, clearance_cache=ClearanceCache(None)
+    )
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except (EOFError, OSError):
+                break
+            if task is None:
+                break
+            op, args = task
+            reply: Dict[str, Any] = {}
+            try:
+                if op == "signin":
+                    reply['result'] = signer.signin(*args)
+                elif op == "clearance":
+                    reply['result'] = signer.solve_clearance()
+                elif op == "warm":
+                    signer.warm_up()
+                else:
+                    reply['error'] = f"未知任务: {op}"
+            except Exception as e:
+                reply['error'] = str(e)
+            # 签到过程中获得的 cf_clearance 交回父进程缓存
+            reply['clearance'] = signer.clearance_cache.get()
+            conn.send(reply)
+    finally:
+        signer.close()
+
+class SeleniumWorker:
+    """Selenium 工作进程句柄 (父进程侧)"""
+    
+    def __init__(self, context, config: Dict[str, Any], proxy: Optional[str]):
+        self.proxy = proxy
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=selenium_worker_main, args=(config, proxy, child_conn), name="selenium-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.cold = True  # 尚未完成首个任务 (浏览器内存尚未体现在 MemAvailable 中)
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+    
+    def kill(self) -> None:
+        """强制终止工作进程及其全部子进程 (chromedriver / Chrome)"""
+        members = process_tree(self.pid)
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        for pid in members:
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass
+        self.process.join(5)
+        self.conn.close()
+    
+    def close(self) -> None:
+        """通知工作进程退出 (关闭浏览器)，超时未退出则强制终止"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(10)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+class SeleniumWorkerPool:
+    """进程隔离的 Selenium 签到器 (接口与 SeleniumSigner 一致)
+    
+    每个工作进程运行一个浏览器并在任务间保持预热。父进程监控每个任务:
+    超过墙钟上限或进程树 RSS 超过上限时整组终止 (含 Chrome)，下次任务重建。
+    新工作进程只在 MemAvailable 足以再容纳一个浏览器时启动，否则等待空闲进程；
+    没有任何工作进程时总是允许启动一个，保证不会停滞。
+    """
+    
+    POLL_INTERVAL = 1.0  # 任务监控间隔 (秒)
+    
+    def __init__(self, config: Dict[str, Any], proxy_pool: Optional[ProxyPool] = None,
+                 clearance_cache: Optional[ClearanceCache] = None):
+        self.config = config
+        self.max_workers = config['selenium_concurrency']
+        self.task_timeout = config['selenium_task_timeout']
+        self.rss_limit_mb = config['selenium_rss_mb']
+        self.admit_mb = config['selenium_admit_mb']
+        self.proxy_pool = proxy_pool if config.get('selenium_proxy', True) else None
+        self.clearance_cache = clearance_cache
+        # spawn: 避免在多线程父进程中 fork
+        self._context = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._idle: List[SeleniumWorker] = []
+        self._workers = 0  # 存活的工作进程 (含空闲与执行中)
+        self._cold = 0     # 已启动但尚未完成首个任务的工作进程
+        self._closed = False
+        self.launches = 0
+        self.kills = 0
+    
+    def _admissible(self) -> bool:
+        """可用内存扣除尚在启动中的浏览器后，仍足以再启动一个"""
+        if self._workers == 0:
+            return True
+        available = read_meminfo_mb()
+        if available is None:
+            return True
+        return available - self._cold * self.admit_mb >= self.admit_mb
+    
+    def _acquire(self) -> SeleniumWorker:
+        stale = []
+        deferred = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Selenium 工作进程池已关闭")
+                worker = self._idle.pop() if self._idle else None
+                if worker is not None:
+                    if worker.process.is_alive() and not (self.proxy_pool and self.proxy_pool.is_evicted(worker.proxy)):
+                        break
+                    # 进程已退出或代理已被剔除: 回收后重新选择
+                    self._workers -= 1
+                    stale.append(worker)
+                    continue
+                if self._workers < self.max_workers:
+                    if self._admissible():
+                        self._workers += 1
+                        self._cold += 1
+                        break
+                    if not deferred:
+                        deferred = True
+                        METRICS.increment("selenium_admission", outcome="deferred")
+                        logging.info(f"🧮 可用内存不足 {self.admit_mb:g}MB，等待空闲浏览器")
+                # 定期醒来重新检查可用内存
+                self._cond.wait(self.POLL_INTERVAL)
+        for item in stale:
+            item.kill()
+        if worker is not None:
+            return worker
+        
         try:
-            self.driver = uc.Chrome(options=chrome_options)
-        except:
-            # GitHub Actions fallback
-            self.driver = webdriver.Chrome(options=chrome_options)
-            
-        # 隐藏自动化特征
-        self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """
-        })
+            proxy = select_browser_proxy(self.proxy_pool)
+            worker = SeleniumWorker(self._context, dict(self.config, selenium_concurrency=1), proxy)
+        except Exception:
+            with self._cond:
+                self._workers -= 1
+                self._cold -= 1
+                self._cond.notify()
+            raise
+        self.launches += 1
+        logging.info(f"🌐 启动浏览器工作进程 PID {worker.pid} (本次运行第 {self.launches} 次)"
+                     + (f"，代理: {proxy_label(proxy)}" if proxy else ""))
+        return worker
+    
+    def _release(self, worker: SeleniumWorker, healthy: bool) -> None:
+        with self._cond:
+            if worker.cold:
+                worker.cold = False
+                self._cold -= 1
+            if healthy and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            self._workers -= 1
+            self._cond.notify()
+        if healthy:
+            worker.close()
+        else:
+            self.kills += 1
+            worker.kill()
+    
+    def _run(self, op: str, *args) -> Tuple[Dict[str, Any], SeleniumWorker]:
+        """在工作进程中执行任务，超时或内存超限时终止整个进程树"""
+        worker = self._acquire()
+        healthy = False
+        started = time.monotonic()
+        try:
+            worker.conn.send((op, args))
+            while not worker.conn.poll(self.POLL_INTERVAL):
+                if not worker.process.is_alive():
+                    raise RuntimeError(f"Selenium 工作进程意外退出 (退出码 {worker.process.exitcode})")
+                if time.monotonic() - started > self.task_timeout:
+                    METRICS.increment("selenium_worker_killed", reason="timeout")
+                    raise TimeoutError(f"Selenium 任务超过 {self.task_timeout:g}s，已终止浏览器进程")
+                if self.rss_limit_mb > 0:
+                    rss = tree_rss_mb(worker.pid)
+                    if rss > self.rss_limit_mb:
+                        METRICS.increment("selenium_worker_killed", reason="memory")
+                        raise MemoryError(f"浏览器内存 {rss:.0f}MB 超过上限 {self.rss_limit_mb:g}MB，已终止浏览器进程")
+            reply = worker.conn.recv()
+            healthy = True
+        finally:
+            self._release(worker, healthy)
         
-    def signin(self, cookie: str) -> SigninResult:
-        """Selenium 签到"""
+        entry = reply.get('clearance')
+        if entry and self.clearance_cache is not None:
+            self.clearance_cache.put(entry['route'], entry['cf_clearance'], entry['user_agent'], entry['expires_at'])
+        if reply.get('error'):
+            raise RuntimeError(reply['error'])
+        return reply, worker
+    
+    def signin(self, cookie: str, random_mode: Optional[bool] = None) -> SigninResult:
+        """在工作进程中执行 Selenium 签到"""
+        if random_mode is None:
+            random_mode = self.config['random_mode']
         try:
-            self.create_driver()
-            
-            # 访问网站
-            self.driver.get("https://www.nodeseek.com")
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # 添加 Cookie
-            for item in cookie.split(";"):
+            with METRICS.span("selenium_worker", op="signin"):
+                reply, worker = self._run("signin", cookie, random_mode)
+        except Exception as e:
+            logging.warning(f"⚠️  {str(e)}")
+            return SigninResult(False, f"Selenium 签到异常: {str(e)}", "selenium", error_class=classify_exception(e))
+        result = reply['result']
+        if (not result.success and worker.proxy and self.proxy_pool
+                and any(key in result.message for key in ("ERR_PROXY", "ERR_TUNNEL"))):
+            self.proxy_pool.report(worker.proxy, False)
+        return result
+    
+    def solve_clearance(self) -> Optional[Dict[str, Any]]:
+        """在工作进程中通过 Cloudflare 质询，返回获得的 clearance"""
+        with METRICS.span("selenium_worker", op="clearance"):
+            reply, _ = self._run("clearance")
+        return reply['result']
+    
+    def warm_up(self) -> None:
+        self._run("warm")
+    
+    def close(self) -> None:
+        """关闭空闲工作进程 (执行中的进程在任务结束时回收)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close()
+
+class FileAccountSource:
+    """文件账户源 (JSONL / CSV，支持 .gz)，逐行生成账户，内存占用与账户数量无关
+    
+    每次迭代都会重新打开文件，因此可被多次遍历 (如预检 + 签到)。
+    字段: cookie (必需), name, username, password, proxy, random, methods。
+    """
+    
+    METHODS = ("http", "proxy", "clearance", "selenium")
+    
+    def __init__(self, path: str):
+        self.path = path
+        name = path[:-3] if path.endswith(".gz") else path
+        self.format = "csv" if name.lower().endswith(".csv") else "jsonl"
+        
+    def _open(self):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, "rt", encoding="utf-8", newline="")
+        return open(self.path, "r", encoding="utf-8", newline="")
+    
+    def _rows(self, f) -> Iterator[Any]:
+        """逐条产出原始记录 (JSONL 为字符串，解析延后到迭代时，便于跳过坏行)"""
+        if self.format == "csv":
+            return csv.DictReader(f)
+        return (line for line in (raw.strip() for raw in f) if line and not line.startswith("#"))
+    
+    @staticmethod
+    def _parse_bool(value: Any) -> Optional[bool]:
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    
+    def _parse_methods(self, value: Any) -> Optional[List[str]]:
+        if not value:
+            return None
+        items = value if isinstance(value, list) else str(value).replace(">", ",").split(",")
+        methods = [str(item).strip().lower() for item in items if str(item).strip()]
+        unknown = [m for m in methods if m not in self.METHODS]
+        if unknown:
+            raise ValueError(f"未知签到方法: {', '.join(unknown)}")
+        return methods or None
+    
+    def build(self, index: int, row: Dict[str, Any]) -> AccountConfig:
+        """校验并构建单个账户 (出错时抛出 ValueError)"""
+        if not isinstance(row, dict):
+            raise ValueError("记录必须是对象")
+        cookie = str(row.get("cookie") or "").strip()
+        if not cookie:
+            raise ValueError("缺少 cookie 字段")
+        username = str(row.get("username") or "")
+        return AccountConfig(
+            index=index,
+            display_name=str(row.get("name") or username or f"账号{index}"),
+            cookie=cookie,
+            username=username,
+            password=str(row.get("password") or ""),
+            proxy_url=str(row.get("proxy") or ""),
+            random_mode=self._parse_bool(row.get("random")),
+            method_preference=self._parse_methods(row.get("methods")),
+        )
+    
+    def __iter__(self) -> Iterator[AccountConfig]:
+        index = 0
+        with self._open() as f:
+            rows = self._rows(f)
+            while True:
                 try:
-                    name, value = item.strip().split("=", 1)
-                    self.driver.add_cookie({
-                        "name": name,
-                        "value": value,
-                        "domain": ".nodeseek.com",
-                        "path": "/",
-                    })
-                except:
+                    row = next(rows)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    index += 1
+                    logging.warning(f"⚠️  账户文件第 {index} 条记录无法解析，跳过: {str(e)}")
                     continue
-                    
-            # 刷新页面
-            self.driver.refresh()
-            time.sleep(3)
-            
-            # 验证登录状态
-            try:
-                username_element = WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "a.Username"))
-                )
-                username = username_element.text.strip()
-                logging.info(f"🔐 Selenium 登录成功: {username}")
-            except:
-                # 检查是否被重定向到登录页面
-                current_url = self.driver.current_url
-                if "signin" in current_url.lower() or "login" in current_url.lower():
-                    return SigninResult(False, "Selenium - Cookie已过期，需要重新登录", "selenium", cookie_expired=True)
-                else:
-                    return SigninResult(False, "Selenium 登录验证失败", "selenium")
-            
-            # 访问签到页面
-            self.driver.get("https://www.nodeseek.com/board")
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".head-info > div"))
-            )
-            
-            # 检查签到状态
-            head_info = self.driver.find_element(By.CSS_SELECTOR, ".head-info > div")
-            buttons = head_info.find_elements(By.TAG_NAME, "button")
-            
-            if not buttons:
-                # 已签到
-                info_text = head_info.text.strip()
-                return SigninResult(True, f"今日已签到: {info_text}", "selenium")
-            
-            # 执行签到
-            sign_div = WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((
-                    By.XPATH, "//div[button[text()='鸡腿 x 5'] and button[text()='试试手气']]"
-                ))
-            )
-            
-            if self.config['random_mode']:
-                button = sign_div.find_element(By.XPATH, ".//button[text()='试试手气']")
-                mode = "试试手气"
-            else:
-                button = sign_div.find_element(By.XPATH, ".//button[text()='鸡腿 x 5']")
-                mode = "鸡腿 x 5"
-                
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-            time.sleep(0.5)
-            button.click()
-            
-            return SigninResult(True, f"Selenium 签到成功 ({mode})", "selenium")
-            
-        except Exception as e:
-            error_msg = str(e)
-            # 检查是否是登录相关错误
-            if any(keyword in error_msg.lower() for keyword in ['login', 'signin', 'authentication', '登录']):
-                return SigninResult(False, f"Selenium - Cookie可能已过期: {error_msg}", "selenium", cookie_expired=True)
-            else:
-                return SigninResult(False, f"Selenium 签到异常: {error_msg}", "selenium")
-        finally:
-            if self.driver:
-                self.driver.quit()
+                index += 1
+                try:
+                    yield self.build(index, json.loads(row) if isinstance(row, str) else row)
+                except ValueError as e:
+                    logging.warning(f"⚠️  账户文件第 {index} 条记录无效，跳过: {str(e)}")
+
+def bounded_map(executor, fn, items: Iterable, window: int) -> Iterator[Tuple[Any, Any]]:
+    """有界并发 map: 最多 window 个任务在途，按输入顺序产出 (输入项, 结果)，支持生成器输入"""
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
+
+def parse_shard(spec: str) -> Optional[Tuple[int, int]]:
+    """解析分片参数 "i/N" (0 <= i < N)，为空时返回 None"""
+    if not spec:
+        return None
+    try:
+        index, count = (int(part) for part in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N: {spec}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"分片参数超出范围: {spec}")
+    return index, count
+
+def result_account(account: AccountConfig) -> SimpleNamespace:
+    """结果中保留的账户信息 (仅报告与历史所需字段，避免长期持有 Cookie)"""
+    return SimpleNamespace(
+        display_name=account.display_name, index=account.index,
+        fingerprint=cookie_fingerprint(account.cookie) if account.cookie else "",
+    )
+
+def shard_of(account: AccountConfig, count: int) -> int:
+    """按 Cookie 指纹的稳定哈希分配分片，账户顺序或数量变化不影响其他账户的归属"""
+    key = cookie_fingerprint(account.cookie) if account.cookie else account.display_name
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) % count
+
+def shard_path(shard_dir: str, index: int, count: int) -> str:
+    return os.path.join(shard_dir, f"shard-{index}-of-{count}.json")
 
 class NodeSeekHybridSigner:
     """NodeSeek 混合签到器主类"""
     
+    METHOD_LABELS = {'http': "HTTP ", 'proxy': "代理", 'clearance': "Clearance ", 'selenium': "Selenium "}
+    
     def __init__(self):
         self.config = EnvironmentDetector.get_env_config()
-        self.http_signer = HTTPSigner(self.config)
-        self.selenium_signer = SeleniumSigner(self.config) if SELENIUM_AVAILABLE else None
+        self.limiter = ConcurrencyLimiter(self.config['host_concurrency'], self.config['selenium_concurrency'])
+        self.scheduler = RateLimitScheduler.from_config(self.config)
+        self.session_pool = HTTPSessionPool(self.config, self.limiter, self.scheduler)
+        self.proxy_pool = ProxyPool.from_config(self.config)
+        self.proxy_pool.start()
+        self.http_signer = HTTPSigner(self.config, self.session_pool, self.proxy_pool)
+        self.notifier = NotificationQueue(self.config, self.session_pool)
+        self.retry_policy = RetryPolicy.from_config(self.config)
+        self.clearance = ClearanceCache(os.path.join(self.config['cache_dir'], "clearance.json"))
+        self._clearance_lock = threading.Lock()
+        self._clearance_failed_at: Optional[float] = None
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self.breaker = CircuitBreaker.from_config(self.config)
+        self.preflight_results: Dict[str, SigninResult] = {}
+        if not SELENIUM_AVAILABLE:
+            self.selenium_signer = None
+        elif self.config['selenium_isolate']:
+            self.selenium_signer = SeleniumWorkerPool(self.config, self.proxy_pool, self.clearance)
+        else:
+            self.selenium_signer = SeleniumSigner(self.config, self.limiter, self.proxy_pool, self.clearance)
+        self.ledger = CreditLedgerCache(os.path.join(self.config['cache_dir'], "credit_ledger.sqlite3")) \
+            if self.config['enable_statistics'] else None
+        self.run_state = RunStateStore(os.path.join(self.config['cache_dir'], "run_state.json"))
+        self.history = RunHistory(self.config['history_file'], self.config['history_raw_days']) \
+            if self.config['history_file'] else None
+        self.router = MethodRouter(
+            os.path.join(self.config['cache_dir'], "router_stats.json"),
+            self.config['router_explore_rate'], self.config['adaptive_routing']
+        )
         
         logging.info(f"🌍 运行环境: {self.config['environment']}")
         logging.info(f"📊 统计功能: {'开启' if self.config['enable_statistics'] else '关闭'}")
@@ -534,45 +3086,231 @@ class NodeSeekHybridSigner:
             
         return account_configs
     
+    def account_source(self) -> Iterable[AccountConfig]:
+        """账户来源: 配置了 NS_ACCOUNTS_FILE 时流式读取文件，否则读取环境变量"""
+        if self.config['accounts_file']:
+            return FileAccountSource(self.config['accounts_file'])
+        return self.load_accounts()
+    
+    def available_methods(self, account: Optional[AccountConfig] = None) -> List[str]:
+        """当前配置下可用的签到方法 (默认顺序: HTTP → 代理 → Selenium，账户可指定顺序)"""
+        methods = ["http"]
+        if self.config['proxy_url'] or (account and account.proxy_url):
+            methods.append("proxy")
+        if (self.selenium_signer and 
+            self.config['enable_selenium'] in ["true", "auto"]):
+            if self.config['clearance_handoff']:
+                methods.append("clearance")
+            methods.append("selenium")
+        if account and account.method_preference:
+            methods = [m for m in account.method_preference if m in methods]
+        return methods
+    
+    def attempt_method(self, method: str, account: AccountConfig) -> SigninResult:
+        """执行单个签到方法"""
+        if method == "http":
+            return self.http_signer.signin(account.cookie, random_mode=account.random_mode)
+        if method == "proxy":
+            return self.http_signer.signin(account.cookie, use_proxy=True, proxy_url=account.proxy_url,
+                                           random_mode=account.random_mode)
+        if method == "clearance":
+            return self.clearance_signin(account)
+        try:
+            return self.selenium_signer.signin(account.cookie, random_mode=account.random_mode)
+        except Exception as e:
+            return SigninResult(False, f"Selenium 异常: {str(e)}", "selenium")
+    
     def progressive_signin(self, account: AccountConfig) -> SigninResult:
-        """渐进式签到策略"""
+        """渐进式签到策略 (方法顺序由自适应路由决定)"""
         logging.info(f"🎯 开始签到: {account.display_name}")
         
         if not account.cookie:
             return SigninResult(False, "无 Cookie", "none")
+        
+        methods = self.available_methods(account)
+        # 账户指定了方法顺序时按指定顺序执行，否则交由自适应路由
+        plan = methods if account.method_preference else self.router.plan(account.cookie, methods)
+        if plan != methods:
+            logging.info(f"🧭 {account.display_name} 路由顺序: {' → '.join(plan)}")
             
-        # 方法 1: HTTP 签到 (优先)
-        result = self.http_signer.signin(account.cookie)
-        if result.success:
-            logging.info(f"✅ HTTP 签到成功: {account.display_name}")
-            return result
-        else:
-            logging.warning(f"⚠️  HTTP 签到失败: {result.message}")
-            
-        # 方法 2: 代理 HTTP 签到 (如果配置了代理)
-        if self.config['proxy_url']:
-            result = self.http_signer.signin(account.cookie, use_proxy=True)
+        result = None
+        previous = None
+        consumed = set()  # 已在对冲中并行尝试过的方法
+        for position, method in enumerate(plan):
+            if method in consumed:
+                continue
+            # 熔断中的方法直接跳过，账户直接使用当前可用的方法；计划中的最后一个方法始终尝试
+            last = all(later in consumed for later in plan[position + 1:])
+            if not self.breaker.allow(method) and not last:
+                METRICS.increment("breaker_skip", method=method)
+                continue
+            if previous:
+                METRICS.increment("fallback", from_method=previous, to_method=method)
+            previous = method
+            partner = self.hedge_partner(method, plan)
+            if partner:
+                method, result, hedged = self.hedged_attempt(method, partner, account)
+                if hedged:
+                    consumed.add(partner)
+            else:
+                result = self.timed_attempt(method, account)
+            label = self.METHOD_LABELS[method]
+                
             if result.success:
-                logging.info(f"✅ 代理签到成功: {account.display_name}")
+                logging.info(f"✅ {label}签到成功: {account.display_name}")
+                return result
+            elif result.cookie_expired:
+                # Cookie 过期是终态: 其他方法只会得到同样的结论，不再继续 fallback
+                logging.warning(f"🚨 {label}检测到Cookie过期，跳过后续签到方法: {account.display_name}")
+                METRICS.increment("fallback_skipped", reason="cookie_expired", method=method)
                 return result
+            elif not self.retry_policy.should_escalate(result):
+                # 瞬时错误已在原方法上重试过，业务拒绝换方法也无效，只有结构性拦截才升级
+                logging.warning(f"⚠️  {label}签到失败 ({result.error_class.value})，不升级签到方法: {result.message}")
+                METRICS.increment("fallback_skipped", reason=result.error_class.value, method=method)
+                return result
+            elif method == "selenium":
+                logging.error(f"❌ {label}签到失败: {result.message}")
             else:
-                logging.warning(f"⚠️  代理签到失败: {result.message}")
+                logging.warning(f"⚠️  {label}签到失败: {result.message}")
         
-        # 方法 3: Selenium 签到 (终极方案)
-        if (self.selenium_signer and 
-            self.config['enable_selenium'] in ["true", "auto"]):
+        if result is None:
+            return SigninResult(False, "没有可用的签到方法", "failed")
+        
+        # 所有方法都失败
+        return SigninResult(False, "所有签到方法都失败，建议手动更新 Cookie", "failed", error_class=result.error_class)
+    
+    def clearance_cooling(self) -> bool:
+        """最近一次质询失败仍在冷却期内"""
+        failed_at = self._clearance_failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.config['clearance_retry']
+    
+    def ensure_clearance(self) -> Optional[Dict[str, Any]]:
+        """获取有效 clearance；缓存为空时只由一个线程启动浏览器通过质询，其余线程等待复用
+        
+        质询失败后在冷却期内不再启动浏览器，避免后续被拦截的账户逐个等待超时。
+        """
+        entry = self.clearance.get()
+        if entry or self.clearance_cooling():
+            return entry
+        with self._clearance_lock:
+            entry = self.clearance.get()
+            if entry or self.clearance_cooling():
+                return entry
+            logging.info("🛡️  启动浏览器通过 Cloudflare 质询，获取 clearance 供 HTTP 复用")
             try:
-                result = self.selenium_signer.signin(account.cookie)
-                if result.success:
-                    logging.info(f"✅ Selenium 签到成功: {account.display_name}")
-                    return result
-                else:
-                    logging.error(f"❌ Selenium 签到失败: {result.message}")
+                entry = self.selenium_signer.solve_clearance()
             except Exception as e:
-                logging.error(f"❌ Selenium 异常: {str(e)}")
+                logging.warning(f"⚠️  获取 clearance 异常: {str(e)}")
+                entry = None
+            METRICS.increment("clearance_solve", outcome="success" if entry else "failure")
+            if entry:
+                self._clearance_failed_at = None
+            else:
+                self._clearance_failed_at = time.monotonic()
+                logging.warning(f"⚠️  未能获取 clearance，{self.config['clearance_retry']:g}s 内不再尝试")
+            return entry
+    
+    def clearance_signin(self, account: AccountConfig) -> SigninResult:
+        """clearance 交接: 复用浏览器获得的 cf_clearance 走 HTTP 签到"""
+        entry = self.ensure_clearance()
+        if not entry:
+            return SigninResult(False, "未能通过 Cloudflare 质询获取 clearance", "clearance",
+                                error_class=ErrorClass.BLOCKED)
+        result = self.http_signer.signin_with_clearance(account.cookie, entry, random_mode=account.random_mode)
+        if result.error_class == ErrorClass.BLOCKED:
+            # clearance 已失效 (过期或出口变化)，下个账户重新获取
+            self.clearance.invalidate(entry['route'])
+        return result
+    
+    def timed_attempt(self, method: str, account: AccountConfig,
+                      cancelled: Optional[threading.Event] = None) -> SigninResult:
+        """执行签到方法 (含重试)，并记录耗时、熔断与路由统计"""
+        started = time.monotonic()
+        with self.session_pool.cancellable(cancelled):
+            result = self.attempt_with_retry(method, account, cancelled)
+        elapsed = time.monotonic() - started
+        if cancelled is not None and cancelled.is_set() and not result.success:
+            # 被取消的一方 (对冲输掉) 结果不反映方法本身，不计入熔断与路由统计
+            return result
+        self.breaker.record(method, result)
+        METRICS.observe("attempt", elapsed, method=method, outcome="success" if result.success else "failure")
+        # Cookie 过期与方法无关，不计入路由统计
+        if not result.cookie_expired:
+            self.router.record(account.cookie, method, result.success, elapsed)
+        return result
+    
+    def hedge_partner(self, method: str, plan: List[str]) -> Optional[str]:
+        """直连 HTTP 之后若计划中还有代理，可作为对冲请求并行发起"""
+        if self.config['hedge_delay'] <= 0 or method != "http" or "proxy" not in plan:
+            return None
+        return "proxy" if plan.index("proxy") > plan.index("http") else None
+    
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=self.config['max_workers'] * 2, thread_name_prefix="hedge"
+                )
+            return self._hedge_pool
+    
+    def hedged_attempt(self, primary: str, secondary: str,
+                       account: AccountConfig) -> Tuple[str, SigninResult, bool]:
+        """对冲请求: 主方法超过阈值未响应时并行发起备用方法，采用最先得到的确定结果
         
-        # 所有方法都失败
-        return SigninResult(False, "所有签到方法都失败，建议手动更新 Cookie", "failed")
+        签到接口对重复签到返回 "已签到"，按成功处理，因此两条线路都成功也无副作用。
+        输掉的一方被取消: 不再发出新请求或重试，结果被丢弃；已发出的请求无法中途中止，
+        单次超时受 hedge_timeout 限制，结束前继续占用主机并发名额。
+        返回 (采用结果的方法, 结果, 是否发起了备用方法)。
+        """
+        delay = self.config['hedge_delay']
+        cancelled = threading.Event()
+        executor = self._hedge_executor()
+        futures = {executor.submit(self.timed_attempt, primary, account, cancelled): primary}
+        done, _ = wait(futures, timeout=delay)
+        if done or not self.breaker.allow(secondary):
+            future = next(iter(futures))
+            return primary, future.result(), False
+        
+        logging.info(f"⏱️  {self.METHOD_LABELS[primary]}{delay:g}s 未响应，并行发起{self.METHOD_LABELS[secondary]}签到: "
+                     f"{account.display_name}")
+        futures[executor.submit(self.timed_attempt, secondary, account, cancelled)] = secondary
+        
+        finished = []
+        for future in as_completed(futures):
+            method, result = futures[future], future.result()
+            finished.append((method, result))
+            # 确定结果: 成功、Cookie 过期或业务拒绝，另一条线路不会给出不同结论
+            if result.success or result.error_class in (ErrorClass.AUTH, ErrorClass.REJECTED):
+                cancelled.set()
+                METRICS.increment("hedge", winner=method)
+                return method, result, True
+        
+        # 两条线路都失败: 优先返回需要升级的结果，让后续方法继续尝试
+        METRICS.increment("hedge", winner="none")
+        escalating = [item for item in finished if self.retry_policy.should_escalate(item[1])]
+        method, result = (escalating or finished)[-1]
+        return method, result, True
+    
+    def attempt_with_retry(self, method: str, account: AccountConfig,
+                           cancelled: Optional[threading.Event] = None) -> SigninResult:
+        """执行签到方法，按错误分类在同一方法上退避重试 (cancelled 置位后不再重试)"""
+        self.retry_policy.budget.record_attempt()
+        result = self.attempt_method(method, account)
+        attempt = 0
+        while not (cancelled and cancelled.is_set()) and self.retry_policy.should_retry(method, result, attempt):
+            delay = self.retry_policy.delay(attempt)
+            attempt += 1
+            logging.info(f"🔁 {self.METHOD_LABELS[method]}第 {attempt} 次重试 ({result.error_class.value}, "
+                         f"{delay:.1f}s 后): {account.display_name}")
+            METRICS.increment("retry", method=method, error_class=result.error_class.value)
+            if cancelled:
+                if cancelled.wait(delay):
+                    break
+            else:
+                time.sleep(delay)
+            result = self.attempt_method(method, account)
+        return result
     
     def enhance_with_statistics(self, result: SigninResult, cookie: str) -> SigninResult:
         """增强结果 - 添加统计信息"""
@@ -580,7 +3318,7 @@ class NodeSeekHybridSigner:
             return result
             
         try:
-            tracker = StatisticsTracker(cookie)
+            tracker = StatisticsTracker(cookie, self.session_pool, self.ledger, self.config['base_url'])
             stats, msg = tracker.get_signin_stats(30)
             if stats:
                 result.statistics = stats
@@ -590,62 +3328,308 @@ class NodeSeekHybridSigner:
             
         return result
     
+    def probe_session(self, cookie: str) -> Optional[SigninResult]:
+        """轻量会话探测: 一次带 Cookie 的 GET，确认过期时返回终态结果，否则返回 None"""
+        url = f"{self.config['base_url']}/api/account/credit/page-1"
+        try:
+            with METRICS.span("preflight"):
+                response = self.session_pool.request(
+                    "GET", url, account_key=cookie_fingerprint(cookie),
+                    headers=self.http_signer.get_headers(cookie),
+                    timeout=min(self.config['timeout'], 15), allow_redirects=False
+                )
+        except Exception as e:
+            logging.debug(f"预检请求异常，按正常流程签到: {str(e)}")
+            return None
+        
+        expired = response.status_code in (401, 302)
+        if response.status_code == 200:
+            try:
+                data = response.json()
+                expired = not data.get("success") and any(
+                    keyword in str(data.get("message", "")) for keyword in ['登录', 'login', 'signin']
+                )
+            except ValueError:
+                expired = False
+        if expired:
+            return SigninResult(False, f"预检: Cookie已过期 (HTTP {response.status_code})", "preflight", cookie_expired=True)
+        return None
+    
+    def preflight(self, accounts: Iterable[AccountConfig]) -> None:
+        """并发预检所有待签到账户，过期账户立即报告并在签到阶段直接跳过"""
+        pending = (
+            account for account in accounts
+            if account.cookie and (self.config['force_signin'] or not self.run_state.signed_today(account.cookie))
+        )
+        
+        logging.info("🩺 会话预检开始")
+        workers = self.config['host_concurrency']
+        probed = 0
+        expired = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preflight") as executor:
+            for account, result in bounded_map(executor, lambda a: self.probe_session(a.cookie), pending, workers * 2):
+                probed += 1
+                if result:
+                    self.preflight_results[cookie_fingerprint(account.cookie)] = result
+                    expired.append(account.display_name)
+                    logging.warning(f"🚨 预检发现Cookie过期: {account.display_name}")
+        
+        logging.info(f"🩺 会话预检完成: {probed} 个账户")
+        if expired:
+            logging.warning(f"🚨 预检发现 {len(expired)} 个Cookie过期: {', '.join(expired)}")
+        else:
+            logging.info("✅ 预检完成，所有账户会话有效")
+    
+    def process_account(self, account: AccountConfig) -> SigninResult:
+        """处理单个账户: 签到 + 统计增强"""
+        logging.info(f"\n{'='*30} {account.display_name} {'='*30}")
+        
+        # 预检已确认过期的账户不再尝试签到
+        expired = self.preflight_results.get(cookie_fingerprint(account.cookie)) if account.cookie else None
+        if expired:
+            METRICS.increment("signin_result", method="preflight", outcome="expired")
+            self.notifier.notify("NodeSeek 签到失败", f"{account.display_name}: {expired.message}")
+            return expired
+        
+        # 今日已成功签到的账户直接跳过 (NS_FORCE=true 时强制重签)
+        if account.cookie and not self.config['force_signin']:
+            state = self.run_state.signed_today(account.cookie)
+            if state:
+                logging.info(f"⏭️  {account.display_name} 今日已签到，跳过")
+                METRICS.increment("signin_result", method="cached", outcome="skipped")
+                return SigninResult(True, f"今日已签到 (本地记录 {state['time']}, {state['method']})", "cached")
+        
+        # 执行签到 (单账户异常不影响其他并发账户)
+        started = time.monotonic()
+        try:
+            with METRICS.span("signin"):
+                result = self.progressive_signin(account)
+        except Exception as e:
+            logging.error(f"💥 {account.display_name} 签到异常: {str(e)}")
+            result = SigninResult(False, f"签到异常: {str(e)}", "failed")
+        result.latency = round(time.monotonic() - started, 3)
+        METRICS.increment("signin_result", method=result.method,
+                          outcome="success" if result.success else "expired" if result.cookie_expired else "failure")
+        
+        if result.success and account.cookie:
+            self.run_state.mark_success(account.cookie, result.method)
+            # 增强统计信息
+            result = self.enhance_with_statistics(result, account.cookie)
+        
+        # 通知入队，由后台线程批量发送
+        title = "NodeSeek 签到成功" if result.success else "NodeSeek 签到失败"
+        self.notifier.notify(title, f"{account.display_name}: {result.message}")
+        return result
+    
+    def iter_results(self, accounts: Iterable[AccountConfig]) -> Iterator[Tuple[AccountConfig, SigninResult]]:
+        """按配置的并发模式流式执行账户，按原账户顺序产出 (账户, 结果)"""
+        mode = self.config['concurrency']
+        workers = self.config['max_workers']
+        if hasattr(accounts, "__len__"):
+            workers = min(workers, len(accounts))
+        
+        if mode == "thread" and workers > 1:
+            logging.info(f"⚡ 线程池并发模式: {workers} 个工作线程")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="signin") as executor:
+                yield from bounded_map(executor, self.process_account, accounts, workers * 2)
+            return
+        
+        if mode == "asyncio" and workers > 1:
+            import asyncio  # 仅 asyncio 模式需要，避免拖慢启动
+            logging.info(f"⚡ asyncio 并发模式: {workers} 个并发任务")
+            # 分批执行，保证生成器输入下内存有界
+            batch = []
+            for account in accounts:
+                batch.append(account)
+                if len(batch) >= workers * 4:
+                    yield from zip(batch, asyncio.run(self._execute_async(batch, workers)))
+                    batch = []
+            if batch:
+                yield from zip(batch, asyncio.run(self._execute_async(batch, workers)))
+            return
+        
+        for account in accounts:
+            yield account, self.process_account(account)
+    
+    def execute_accounts(self, accounts: Iterable[AccountConfig]) -> List[SigninResult]:
+        """执行所有账户，结果保持原账户顺序"""
+        return [result for _, result in self.iter_results(accounts)]
+    
+    async def _execute_async(self, accounts: List[AccountConfig], workers: int) -> List[SigninResult]:
+        """asyncio 调度: 阻塞签到逻辑交由线程池执行，由信号量控制并发"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="signin")
+        
+        async def worker(account: AccountConfig) -> SigninResult:
+            async with semaphore:
+                return await loop.run_in_executor(executor, self.process_account, account)
+        
+        try:
+            # gather 按传入顺序返回结果
+            return await asyncio.gather(*(worker(account) for account in accounts))
+        finally:
+            executor.shutdown(wait=True)
+    
     def run(self):
         """主执行流程"""
         logging.info("🚀 NodeSeek 混合签到器启动")
         logging.info("=" * 50)
+        METRICS.reset()
+        shard = parse_shard(self.config['shard'])
         
-        accounts = self.load_accounts()
-        if not accounts:
+        source = self.account_source()
+        accounts = iter(source)
+        first = next(accounts, None)
+        if first is None:
             logging.error("❌ 未找到任何账户配置")
             return
-            
-        logging.info(f"📋 发现 {len(accounts)} 个账户")
         
-        results = []
-        cookies_updated = False
-        updated_cookies = []
-        expired_accounts = []  # 记录Cookie过期的账户
+        if hasattr(source, "__len__"):
+            logging.info(f"📋 发现 {len(source)} 个账户")
+        else:
+            logging.info(f"📋 从文件流式读取账户: {self.config['accounts_file']}")
         
-        for account in accounts:
-            logging.info(f"\n{'='*30} {account.display_name} {'='*30}")
-            
-            # 执行签到
-            result = self.progressive_signin(account)
-            
-            # 增强统计信息
-            if result.success and account.cookie:
-                result = self.enhance_with_statistics(result, account.cookie)
-            
-            # 记录结果
-            results.append((account, result))
-            
-            if result.success:
-                logging.info(f"✅ {account.display_name}: {result.message}")
-                updated_cookies.append(account.cookie)
+        accounts = itertools.chain([first], accounts)
+        if shard:
+            # 按分片过滤时保持流式读取: 执行与预检各自对账户来源做一遍过滤
+            logging.info(f"🧩 分片模式: {shard[0]}/{shard[1]}")
+            accounts = (account for account in accounts if shard_of(account, shard[1]) == shard[0])
+        
+        if self.config['preflight']:
+            self.preflight(source if not shard else
+                           (account for account in source if shard_of(account, shard[1]) == shard[0]))
+        
+        results = []
+        try:
+            for account, result in self.iter_results(accounts):
+                # 记录结果 (仅保留报告所需字段，避免长期持有 Cookie)
+                results.append((result_account(account), result))
+                
+                if result.success:
+                    logging.info(f"✅ {account.display_name}: {result.message}")
+                    continue
                 
-                # 发送通知
-                if NOTIFICATION_AVAILABLE:
-                    try:
-                        send(f"NodeSeek 签到成功", f"{account.display_name}: {result.message}")
-                    except Exception as e:
-                        logging.warning(f"⚠️  通知发送失败: {str(e)}")
-                        
-            else:
                 logging.error(f"❌ {account.display_name}: {result.message}")
-                updated_cookies.append(account.cookie)  # 保持原 Cookie
                 
                 # 检查是否Cookie过期
                 if result.cookie_expired:
-                    expired_accounts.append(account.display_name)
                     logging.warning(f"🚨 检测到Cookie过期: {account.display_name}")
-                
-                # 发送失败通知
-                if NOTIFICATION_AVAILABLE:
-                    try:
-                        send(f"NodeSeek 签到失败", f"{account.display_name}: {result.message}")
-                    except:
-                        pass
+        finally:
+            self.run_state.save()
+            self.router.save()
+            self.clearance.save()
+        
+        self.record_run(results)
+        if shard:
+            logging.info(f"📋 本分片 {len(results)} 个账户")
+            # 汇总报告由 --merge 统一生成
+            self.write_shard(shard, results)
+        else:
+            self.report(results)
+        self.shutdown()
+    
+    def write_shard(self, shard: Tuple[int, int], results: List[Tuple[Any, SigninResult]]) -> str:
+        """原子写入本分片的部分结果"""
+        index, count = shard
+        path = shard_path(self.config['shard_dir'], index, count)
+        payload = {
+            'shard': index,
+            'shards': count,
+            'finished_at': datetime.now().isoformat(timespec="seconds"),
+            'results': [
+                {'index': account.index, 'display_name': account.display_name,
+                 'fingerprint': account.fingerprint, **asdict(result)}
+                for account, result in results
+            ],
+        }
+        with atomic_write(path) as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        logging.info(f"💾 分片结果已写入: {path} ({len(results)} 个账户)")
+        return path
+    
+    def load_shards(self) -> Tuple[List[Tuple[Any, SigninResult]], List[str]]:
+        """读取所有分片结果，按账户原始顺序合并，返回 (结果, 缺失分片)"""
+        shard_dir = self.config['shard_dir']
+        payloads = {}
+        try:
+            names = sorted(os.listdir(shard_dir))
+        except OSError:
+            names = []
+        for name in names:
+            if not (name.startswith("shard-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(shard_dir, name), "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                payloads[(int(payload['shard']), int(payload['shards']))] = payload
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.warning(f"⚠️  分片结果无法读取，跳过 {name}: {str(e)}")
+        
+        counts = {count for _, count in payloads}
+        if len(counts) > 1:
+            logging.warning(f"⚠️  分片结果的分片总数不一致: {sorted(counts)}，请清理旧结果")
+        count = max(counts) if counts else 0
+        missing = [f"{i}/{count}" for i in range(count) if (i, count) not in payloads]
+        
+        results = []
+        for (_, total), payload in payloads.items():
+            if total != count:
+                continue
+            for record in payload['results']:
+                account = SimpleNamespace(index=record.pop('index'), display_name=record.pop('display_name'),
+                                          fingerprint=record.pop('fingerprint', ""))
+                results.append((account, SigninResult(**record)))
+        results.sort(key=lambda item: item[0].index)
+        return results, missing
+    
+    def merge(self):
+        """合并各分片结果，生成与单进程运行一致的汇总报告"""
+        logging.info("🧩 合并分片结果")
+        logging.info("=" * 50)
+        results, missing = self.load_shards()
+        if missing:
+            logging.warning(f"⚠️  缺少分片结果: {', '.join(missing)}")
+        if not results and not missing:
+            logging.error(f"❌ 未找到分片结果: {self.config['shard_dir']}")
+            self.shutdown()
+            return
+        # 各分片已在自己的缓存中追加历史，这里只输出汇总 JSON 报告
+        self.record_run(results, append_history=False)
+        self.report(results, missing)
+        self.shutdown()
+    
+    def record_run(self, results: List[Tuple[Any, SigninResult]], append_history: bool = True) -> None:
+        """结构化记录: 追加签到历史 (跳过本地缓存命中)，并按配置写入本次运行的 JSON 报告"""
+        records = [run_record(account, result) for account, result in results]
+        if append_history and self.history:
+            try:
+                self.history.append([record for record in records if record['method'] != "cached"])
+            except OSError as e:
+                logging.warning(f"⚠️  签到历史写入失败: {str(e)}")
+        
+        path = self.config['report_file']
+        if not path:
+            return
+        summary = RunHistory.empty_rollup()
+        for record in records:
+            RunHistory.add(summary, record)
+        try:
+            with atomic_write(path) as f:
+                json.dump({
+                    'finished_at': datetime.now().isoformat(timespec="seconds"),
+                    'summary': summary,
+                    'records': records,
+                }, f, ensure_ascii=False, indent=2)
+            logging.info(f"📄 运行报告已写入: {path}")
+        except OSError as e:
+            logging.warning(f"⚠️  运行报告写入失败: {str(e)}")
+    
+    def report(self, results: List[Tuple[Any, SigninResult]], missing_shards: Iterable[str] = ()) -> None:
+        """生成摘要报告并推送 Cookie 过期提醒与签到结果"""
+        expired_accounts = [account.display_name for account, result in results if result.cookie_expired]
+        missing_shards = list(missing_shards)
         
         # 发送Cookie过期的TG通知
         if expired_accounts:
@@ -655,11 +3639,11 @@ class NodeSeekHybridSigner:
                 expired_msg += f"{i}. {account_name}\n"
             expired_msg += f"\n请到GitHub仓库的Variables页面更新NS_COOKIE变量"
             
-            # 发送TG通知
-            if send_telegram_message(expired_msg):
-                logging.info(f"✅ 已通过TG通知Cookie过期: {len(expired_accounts)}个账户")
+            # 发送TG通知 (入队，退出前统一发送)
+            if self.notifier.telegram(expired_msg):
+                logging.info(f"📨 Cookie过期通知已加入TG推送队列: {len(expired_accounts)}个账户")
             else:
-                logging.warning(f"⚠️  TG通知发送失败，但检测到{len(expired_accounts)}个Cookie过期")
+                logging.warning(f"⚠️  TG通知未发送，但检测到{len(expired_accounts)}个Cookie过期")
         
         # Cookie检查完毕 - 用户可根据TG通知手动更新过期Cookie
         logging.info("ℹ️  Cookie状态已检查完毕，过期Cookie已通过TG通知")
@@ -702,25 +3686,318 @@ class NodeSeekHybridSigner:
                 summary_msg += f"🚨 <b>Cookie过期：{expired_count}个账户</b>\n"
                 summary_msg += f"💡 请及时更新过期的Cookie以确保正常签到\n\n"
         
+        if missing_shards:
+            summary_msg += f"⚠️ <b>缺少分片结果：{', '.join(missing_shards)}</b>\n\n"
+        
         # 添加统计摘要
         summary_msg += f"📊 <b>统计摘要</b>\n"
         summary_msg += f"✅ 成功：{success_count}个\n"
         summary_msg += f"❌ 失败：{len(failed_results)}个\n"
-        summary_msg += f"📈 成功率：{(success_count/len(results)*100):.1f}%"
+        summary_msg += f"📈 成功率：{(success_count/len(results)*100 if results else 0):.1f}%"
         
         # 发送TG通知（无论成功失败都发送）
-        if send_telegram_message(summary_msg):
-            logging.info("✅ 签到结果已通过TG推送")
-        else:
-            logging.warning("⚠️  TG推送失败，但签到任务已完成")
-            
+        if self.notifier.telegram(summary_msg):
+            logging.info("📨 签到结果已加入TG推送队列")
+    
+    def shutdown(self) -> None:
+        """发送剩余通知并释放会话、浏览器与缓存资源"""
+        # 退出前发送队列中剩余的通知
+        self.notifier.close()
+        if self.notifier.failed:
+            logging.warning(f"⚠️  {self.notifier.failed} 条通知发送失败，但签到任务已完成")
+        elif self.notifier.delivered:
+            logging.info(f"✅ 通知已全部发送 ({self.notifier.delivered} 条)")
+        
+        self.proxy_pool.stop()
+        if self._hedge_pool:
+            # 等待输掉的对冲请求结束 (单次超时受 hedge_timeout 限制)，其会话归还后再统一关闭
+            self._hedge_pool.shutdown(wait=True)
+        self.session_pool.close()
+        if self.selenium_signer:
+            self.selenium_signer.close()
+        if self.ledger:
+            self.ledger.close()
+        self.export_metrics()
         logging.info("🏁 混合签到器执行完毕")
+    
+    def export_metrics(self) -> None:
+        """输出阶段耗时摘要，并按配置导出 JSON / Prometheus 指标"""
+        logging.info(f"⏱️  阶段耗时: {METRICS.summary()}")
+        if not self.config['metrics_dir']:
+            return
+        try:
+            METRICS.export(self.config['metrics_dir'])
+            logging.info(f"📈 运行指标已导出: {self.config['metrics_dir']}")
+        except OSError as e:
+            logging.warning(f"⚠️  运行指标导出失败: {str(e)}")
+
+def parse_window(spec: str) -> Tuple[int, int]:
+    """解析每日时间窗口 "HH:MM-HH:MM"，返回当日起止秒数"""
+    try:
+        start, end = (
+            int(hours) * 3600 + int(minutes) * 60
+            for hours, minutes in (part.strip().split(":", 1) for part in spec.split("-", 1))
+        )
+    except ValueError:
+        raise ValueError(f"时间窗口格式应为 HH:MM-HH:MM: {spec}")
+    if not 0 <= start < end <= 86400:
+        raise ValueError(f"时间窗口无效 (不支持跨午夜): {spec}")
+    return start, end
+
+class SigninDaemon:
+    """常驻模式: 进程内按每日时间窗口调度签到，复用会话、指纹配置与浏览器
+    
+    每个账户在窗口内的签到时刻由账户指纹与日期哈希得出 (每日不同、账户间错开)；
+    已错过时刻且今日未签到的账户立即补签。本地状态接口:
+      GET  /status  下次签到时刻、待签到数量与最近结果
+      POST /run     立即签到今日剩余账户
+    """
+    
+    RECENT_LIMIT = 100
+    
+    def __init__(self, signer: NodeSeekHybridSigner, window: str = "08:00-10:00", host: str = "127.0.0.1",
+                 port: int = 0, warm_browser: bool = False):
+        self.signer = signer
+        self.window_spec = window
+        self.window = parse_window(window)
+        self.host = host
+        self.port = port
+        self.warm_browser = warm_browser
+        self.started_at = datetime.now()
+        self.recent: deque = deque(maxlen=self.RECENT_LIMIT)
+        self.schedule: List[Tuple[datetime, AccountConfig]] = []
+        self.next_window: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._run_now = False
+        self._server = None
+        
+    @classmethod
+    def from_config(cls, signer: NodeSeekHybridSigner) -> "SigninDaemon":
+        config = signer.config
+        return cls(signer, config['daemon_window'], config['daemon_host'], config['daemon_port'],
+                   config['daemon_warm_browser'])
+    
+    def window_start(self, day) -> datetime:
+        return datetime.combine(day, datetime.min.time()) + timedelta(seconds=self.window[0])
+    
+    def slot(self, account: AccountConfig, day) -> datetime:
+        """账户当日的签到时刻 (窗口内按指纹 + 日期哈希抖动)"""
+        start, end = self.window
+        key = f"{cookie_fingerprint(account.cookie)}|{day.isoformat()}"
+        offset = int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) % (end - start)
+        return self.window_start(day) + timedelta(seconds=offset)
+    
+    def plan_day(self, day) -> List[Tuple[datetime, AccountConfig]]:
+        """生成当日计划 (每天重新读取账户来源，跳过今日已签到的账户)"""
+        plan = []
+        shard = parse_shard(self.signer.config['shard'])
+        for account in self.signer.account_source():
+            if shard and shard_of(account, shard[1]) != shard[0]:
+                continue
+            if not account.cookie:
+                logging.warning(f"⚠️  {account.display_name} 无 Cookie，跳过")
+                continue
+            if not self.signer.config['force_signin'] and self.signer.run_state.signed_today(account.cookie):
+                continue
+            plan.append((self.slot(account, day), account))
+        plan.sort(key=lambda item: item[0])
+        return plan
+    
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            upcoming = self.schedule[0] if self.schedule else None
+            return {
+                'started_at': self.started_at.isoformat(timespec="seconds"),
+                'window': self.window_spec,
+                'pending': len(self.schedule),
+                'next_run': {'account': upcoming[1].display_name, 'at': upcoming[0].isoformat(timespec="seconds")}
+                if upcoming else None,
+                'next_window': self.next_window.isoformat(timespec="seconds") if self.next_window else None,
+                'recent': list(self.recent),
+            }
+    
+    def trigger(self) -> None:
+        """立即签到今日剩余账户"""
+        with self._lock:
+            self._run_now = True
+        self._wake.set()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+    
+    def start_status_server(self) -> None:
+        """启动本地状态接口 (后台线程)"""
+        if self.port <= 0:
+            return
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        daemon = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_GET(self):
+                if self.path.rstrip("/") in ("", "/status"):
+                    self._send(200, daemon.status())
+                else:
+                    self._send(404, {'error': "not found"})
+            
+            def do_POST(self):
+                if self.path.rstrip("/") == "/run":
+                    daemon.trigger()
+                    self._send(202, {'accepted': True})
+                else:
+                    self._send(404, {'error': "not found"})
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="daemon-status", daemon=True).start()
+        logging.info(f"📡 状态接口: http://{self.host}:{self._server.server_address[1]}/status")
+    
+    def warm_up(self) -> None:
+        """预热: 指纹探测、可选预启动浏览器 (归还浏览器池后保持空闲)"""
+        self.signer.session_pool.profiles.get()
+        if self.warm_browser and self.signer.selenium_signer:
+            try:
+                self.signer.selenium_signer.warm_up()
+            except Exception as e:
+                logging.warning(f"⚠️  浏览器预热失败: {str(e)}")
+    
+    def _due(self, now: datetime) -> List[AccountConfig]:
+        with self._lock:
+            run_now, self._run_now = self._run_now, False
+            due = [account for at, account in self.schedule if run_now or at <= now]
+            self.schedule = self.schedule[len(due):] if not run_now else []
+        return due
+    
+    def run_day(self, day) -> None:
+        """执行当日计划，全部完成后发送当日汇总报告"""
+        METRICS.reset()
+        plan = self.plan_day(day)
+        with self._lock:
+            self.schedule = plan
+        if plan:
+            logging.info(f"🗓️  {day.isoformat()} 计划签到 {len(plan)} 个账户 (窗口 {self.window_spec})")
+        
+        results = []
+        while not self._stop.is_set():
+            due = self._due(datetime.now())
+            if due:
+                try:
+                    for account, result in self.signer.iter_results(due):
+                        results.append((result_account(account), result))
+                        if result.success:
+                            logging.info(f"✅ {account.display_name}: {result.message}")
+                        else:
+                            logging.error(f"❌ {account.display_name}: {result.message}")
+                        with self._lock:
+                            self.recent.appendleft({
+                                'account': account.display_name,
+                                'success': result.success,
+                                'method': result.method,
+                                'error_class': result.error_class.value,
+                                'message': result.message,
+                                'at': datetime.now().isoformat(timespec="seconds"),
+                            })
+                finally:
+                    self.signer.run_state.save()
+                    self.signer.router.save()
+                    self.signer.clearance.save()
+                continue
+            with self._lock:
+                upcoming = self.schedule[0][0] if self.schedule else None
+            if upcoming is None:
+                break
+            # 定期醒来以响应 /run 与停止信号
+            self._wake.wait(min(max(0.0, (upcoming - datetime.now()).total_seconds()), 60))
+            self._wake.clear()
+        
+        if results:
+            self.signer.record_run(results)
+            self.signer.report(results)
+            self.signer.export_metrics()
+    
+    def run_forever(self) -> None:
+        logging.info(f"🛰️  常驻模式启动，每日签到窗口 {self.window_spec}")
+        self.start_status_server()
+        self.warm_up()
+        try:
+            while not self._stop.is_set():
+                today = datetime.now().date()
+                self.run_day(today)
+                
+                self.next_window = self.window_start(today + timedelta(days=1))
+                logging.info(f"💤 今日计划已完成，下次签到窗口: {self.next_window.strftime('%Y-%m-%d %H:%M')}")
+                while not self._stop.is_set() and datetime.now() < self.next_window:
+                    self._wake.wait(min(max(0.0, (self.next_window - datetime.now()).total_seconds()), 60))
+                    self._wake.clear()
+                    with self._lock:
+                        run_now = self._run_now
+                    if run_now:
+                        break  # /run: 重新检查今日是否有未签到的账户
+                self.next_window = None
+        finally:
+            if self._server:
+                self._server.shutdown()
+            self.signer.shutdown()
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """主函数"""
+    import argparse
+    parser = argparse.ArgumentParser(description="NodeSeek 混合签到器")
+    parser.add_argument("--shard", help="只处理指定分片 i/N (默认读取 NS_SHARD)")
+    parser.add_argument("--shard-dir", help="分片结果目录 (默认读取 NS_SHARD_DIR)")
+    parser.add_argument("--merge", action="store_true", help="合并各分片结果并发送汇总报告")
+    parser.add_argument("--daemon", action="store_true", help="常驻模式: 按 NS_DAEMON_WINDOW 每日调度签到")
+    parser.add_argument("--history", action="store_true", help="查询签到历史趋势 (不执行签到)")
+    parser.add_argument("--days", type=int, default=30, help="历史查询: 最近多少天")
+    parser.add_argument("--group", default="day", choices=["day", "week", "month"], help="历史查询: 聚合粒度")
+    parser.add_argument("--account", help="历史查询: 只看指定账户 (如 账号1)")
+    parser.add_argument("--json", help="历史查询: 同时将结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+    
+    if args.history:
+        config = EnvironmentDetector.get_env_config()
+        if not config['history_file']:
+            logging.error("❌ 签到历史已关闭 (NS_HISTORY_FILE 为空)")
+            return
+        rows = history_report(RunHistory(config['history_file'], config['history_raw_days']),
+                              max(1, args.days), args.group, args.account)
+        print_history(rows)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False, indent=2)
+            print(f"💾 结果已写入 {args.json}")
+        return
+    
     try:
         signer = NodeSeekHybridSigner()
-        signer.run()
+        if args.shard is not None:
+            signer.config['shard'] = args.shard
+        if args.shard_dir:
+            signer.config['shard_dir'] = args.shard_dir
+        if args.merge:
+            signer.merge()
+        elif args.daemon:
+            daemon = SigninDaemon.from_config(signer)
+            try:
+                signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+            except ValueError:
+                pass  # 非主线程无法注册信号
+            daemon.run_forever()
+        else:
+            signer.run()
     except KeyboardInterrupt:
         logging.info("⏹️  用户中断执行")
     except Exception as e: